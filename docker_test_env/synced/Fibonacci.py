@@ -2,8 +2,44 @@
 """
 Fibonacci Sequence Implementation
 This script provides multiple methods to calculate Fibonacci numbers.
+
+Run without arguments for the interactive demo, or stream terms
+non-interactively:
+    python Fibonacci.py --n 10000000 --mod 1000000007 --format jsonl -o fib.jsonl
+    python Fibonacci.py --n 1000000 --method chunks --format binary > fib.u64
 """
 
+import argparse
+import array
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from math import gcd, inf
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Fixed-width modes for bulk generation: numpy dtype and array.array typecode
+BULK_MODES = {
+    "mod64": ("uint64", "Q"),
+    "float64": ("float64", "d"),
+}
+
+# Pisano periods are only computed for moduli that can be factored quickly
+PISANO_MAX_MODULUS = 10**12
+
+
 def fibonacci_recursive(n):
     """
     Calculate nth Fibonacci number using recursion.
@@ -28,19 +64,265 @@ def fibonacci_iterative(n):
     return b
 
 
-def fibonacci_memoized(n, memo={}):
+class FibonacciCache:
     """
-    Calculate nth Fibonacci number using memoization.
-    Time complexity: O(n) - efficient with caching
+    Bounded, thread-safe cache of Fibonacci checkpoints.
+    Only every k-th pair (F(ck), F(ck+1)) is stored. F(n) is computed
+    by iterating fewer than k steps from the checkpoint at or below n;
+    a missing checkpoint is computed with fast doubling and stored.
+    Entries are evicted least-recently-used once either the entry
+    limit or the byte budget is exceeded.
     """
-    if n in memo:
-        return memo[n]
-    
-    if n <= 1:
-        return n
-    
-    memo[n] = fibonacci_memoized(n - 1, memo) + fibonacci_memoized(n - 2, memo)
-    return memo[n]
+
+    def __init__(self, checkpoint_interval=64, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be positive")
+        self.checkpoint_interval = checkpoint_interval
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _checkpoint(self, index):
+        with self._lock:
+            pair = self._entries.get(index)
+            if pair is not None:
+                self._entries.move_to_end(index)
+                self.hits += 1
+                return pair
+            self.misses += 1
+
+        # Compute outside the lock so other threads are not blocked
+        a, b = _fast_doubling_pair(index, use_gmpy=False)
+        pair = (a, b)
+        size = sys.getsizeof(a) + sys.getsizeof(b)
+
+        with self._lock:
+            if index not in self._entries:
+                self._entries[index] = pair
+                self._bytes += size
+                while self._entries and (
+                    len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+                ):
+                    _, (old_a, old_b) = self._entries.popitem(last=False)
+                    self._bytes -= sys.getsizeof(old_a) + sys.getsizeof(old_b)
+                    self.evictions += 1
+        return pair
+
+    def get(self, n):
+        """Return F(n)."""
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        index = n - n % self.checkpoint_interval
+        a, b = self._checkpoint(index)
+        for _ in range(n - index):
+            a, b = b, a + b
+        return a
+
+    def stats(self):
+        """Return hit/miss statistics and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+_default_cache = FibonacciCache()
+
+
+def fibonacci_memoized(n, cache=None):
+    """
+    Calculate nth Fibonacci number using a bounded checkpoint cache.
+    Time complexity: O(k) per call once the nearest checkpoint is cached,
+    O(log n + k) otherwise. No recursion, so large n is safe.
+    Uses a shared module-level cache unless one is passed in.
+    """
+    if cache is None:
+        cache = _default_cache
+    return cache.get(n)
+
+
+def _fast_doubling_pair(n, use_gmpy=True):
+    """
+    Return the pair (F(n), F(n+1)) using fast doubling.
+    Walks the bits of n from the most significant one:
+        F(2k)   = F(k) * (2*F(k+1) - F(k))
+        F(2k+1) = F(k)^2 + F(k+1)^2
+    """
+    if use_gmpy and gmpy2 is not None:
+        a, b = gmpy2.mpz(0), gmpy2.mpz(1)
+    else:
+        a, b = 0, 1
+
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a, b
+
+
+def fibonacci_fast_doubling(n, use_gmpy=True):
+    """
+    Calculate nth Fibonacci number using fast doubling.
+    Time complexity: O(log n) big-integer multiplications.
+    Uses gmpy2 for faster multiplication when it is installed.
+    """
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    return int(_fast_doubling_pair(n, use_gmpy)[0])
+
+
+def verify_fast_doubling(limit=500):
+    """
+    Cross-check fibonacci_fast_doubling against fibonacci_iterative for n < limit.
+    Raises AssertionError on the first mismatch.
+    """
+    for n in range(limit):
+        expected = fibonacci_iterative(n)
+        for use_gmpy in (False, True):
+            result = fibonacci_fast_doubling(n, use_gmpy=use_gmpy)
+            assert result == expected, f"F({n}): expected {expected}, got {result} (gmpy2={use_gmpy})"
+    return True
+
+
+def _fast_doubling_pair_mod(n, m):
+    """Return (F(n) mod m, F(n+1) mod m) using fast doubling with reduction."""
+    a, b = 0, 1 % m
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a) % m
+        d = (a * a + b * b) % m
+        if bit == "1":
+            a, b = d, (c + d) % m
+        else:
+            a, b = c, d
+    return a, b
+
+
+def _factorize(n):
+    """Return the prime factorization of n as {prime: exponent} (trial division)."""
+    factors = {}
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+def _is_period(period, m):
+    return _fast_doubling_pair_mod(period, m) == (0, 1 % m)
+
+
+@lru_cache(maxsize=4096)
+def pisano_period(m):
+    """
+    Return the Pisano period of m, the period of F(n) mod m.
+    Builds a multiple of the period from the prime factors of m
+    (pi(p^k) divides p^(k-1) * pi(p), and pi(p) divides p - 1 or
+    2(p + 1) depending on p mod 5), then divides out primes while
+    the result is still a period. Results are cached per modulus.
+    """
+    if m < 1:
+        raise ValueError("m must be positive")
+    if m == 1:
+        return 1
+
+    bound = 1
+    for p, k in _factorize(m).items():
+        if p == 2:
+            prime_bound = 3
+        elif p == 5:
+            prime_bound = 20
+        elif p % 5 in (1, 4):
+            prime_bound = p - 1
+        else:
+            prime_bound = 2 * (p + 1)
+        prime_power_bound = p ** (k - 1) * prime_bound
+        bound = bound * prime_power_bound // gcd(bound, prime_power_bound)
+
+    period = bound
+    for q in _factorize(bound):
+        while period % q == 0 and _is_period(period // q, m):
+            period //= q
+    return period
+
+
+def fibonacci_mod(n, m):
+    """
+    Calculate F(n) mod m.
+    Time complexity: O(log n) - n is first reduced by the cached
+    Pisano period when m is small enough to factor quickly.
+    """
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    if m < 1:
+        raise ValueError("m must be positive")
+    if m <= PISANO_MAX_MODULUS:
+        n %= pisano_period(m)
+    return _fast_doubling_pair_mod(n, m)[0]
+
+
+def fibonacci_mod_batch(ns, ms):
+    """
+    Calculate F(n) mod m for many (n, m) queries in one call.
+    ms may be a single modulus shared by all queries. Each distinct
+    modulus has its Pisano period computed once. With numpy installed
+    and all moduli below 2^31 the doubling steps run vectorized across
+    the whole batch; otherwise the queries are answered one by one.
+    Returns a list of results in query order.
+    """
+    ns = [int(n) for n in ns]
+    if isinstance(ms, int):
+        ms = [ms] * len(ns)
+    else:
+        ms = [int(m) for m in ms]
+    if len(ns) != len(ms):
+        raise ValueError("ns and ms must have the same length")
+    if any(n < 0 for n in ns) or any(m < 1 for m in ms):
+        raise ValueError("n must be non-negative and m positive")
+
+    reduced = [
+        n % pisano_period(m) if m <= PISANO_MAX_MODULUS else n
+        for n, m in zip(ns, ms)
+    ]
+
+    if np is None or not ns or max(ms) >= 2**31 or max(reduced) >= 2**63:
+        return [_fast_doubling_pair_mod(n, m)[0] for n, m in zip(reduced, ms)]
+
+    # Values stay below 2^31, so products and sums fit in uint64
+    n_arr = np.array(reduced, dtype=np.uint64)
+    m_arr = np.array(ms, dtype=np.uint64)
+    a = np.zeros(len(ns), dtype=np.uint64)
+    b = np.ones(len(ns), dtype=np.uint64) % m_arr
+    for shift in range(max(reduced).bit_length() - 1, -1, -1):
+        c = a * ((2 * b + m_arr - a) % m_arr) % m_arr
+        d = (a * a + b * b) % m_arr
+        bit = ((n_arr >> np.uint64(shift)) & np.uint64(1)).astype(bool)
+        a = np.where(bit, d, c)
+        b = np.where(bit, (c + d) % m_arr, d)
+    return a.tolist()
 
 
 def fibonacci_sequence(n):
@@ -73,8 +355,174 @@ def fibonacci_generator(n):
         a, b = b, a + b
 
 
-def main():
-    """Main function to demonstrate different Fibonacci implementations."""
+def _range_chunk(start, stop):
+    """Compute [F(start), ..., F(stop - 1)], seeded by one fast-doubling jump."""
+    a, b = _fast_doubling_pair(start, use_gmpy=False)
+    a, b = int(a), int(b)
+    terms = []
+    for _ in range(stop - start):
+        terms.append(a)
+        a, b = b, a + b
+    return terms
+
+
+def fibonacci_range(start, stop, chunk_size=10_000, workers=None):
+    """
+    Yield F(start), ..., F(stop - 1) in order.
+    The range is split into chunks; each chunk jumps to its starting
+    pair with fast doubling (O(log n)) and is filled iteratively, with
+    chunks computed in parallel across a process pool. At most two
+    chunks per worker are in flight, so memory stays bounded.
+    workers defaults to the CPU count; workers=1 runs in-process.
+    """
+    if start < 0 or stop < start:
+        raise ValueError("require 0 <= start <= stop")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    bounds = [(lo, min(lo + chunk_size, stop)) for lo in range(start, stop, chunk_size)]
+
+    if workers <= 1 or len(bounds) <= 1:
+        for lo, hi in bounds:
+            yield from _range_chunk(lo, hi)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        next_chunk = iter(bounds)
+        for lo, hi in next_chunk:
+            pending.append(executor.submit(_range_chunk, lo, hi))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            terms = pending.popleft().result()
+            for lo, hi in next_chunk:
+                pending.append(executor.submit(_range_chunk, lo, hi))
+                break
+            yield from terms
+
+
+def _check_bulk_mode(mode):
+    if mode not in BULK_MODES:
+        raise ValueError(f"mode must be one of {sorted(BULK_MODES)}")
+
+
+def _as_float(value):
+    """float(value), saturating to inf for integers past the double range."""
+    try:
+        return float(value)
+    except OverflowError:
+        return inf
+
+
+def _fill_array_fallback(out, count, a=0, b=1):
+    """Fill out[:count] term by term (array.array or numpy without doubling)."""
+    mask = 2**64 - 1
+    integer = isinstance(out, array.array) and out.typecode == "Q"
+    for i in range(count):
+        out[i] = a if integer else _as_float(a)
+        a, b = b, (a + b) & mask if integer else a + b
+    return out
+
+
+def fibonacci_array(n, mode="mod64", out=None):
+    """
+    Generate the first n Fibonacci numbers into a fixed-width buffer.
+    mode "mod64" gives F(i) mod 2^64, "float64" gives F(i) as doubles
+    (inf beyond F(1476)). Uses 8 bytes per term.
+    With numpy the buffer is filled by block doubling,
+        F(L + i) = F(L) * F(i + 1) + F(L - 1) * F(i),
+    so only O(log n) vectorized passes are needed. Without numpy an
+    array.array is filled term by term.
+    out may be a preallocated buffer of at least n elements.
+    """
+    _check_bulk_mode(mode)
+    dtype, typecode = BULK_MODES[mode]
+
+    if np is None:
+        if out is None:
+            out = array.array(typecode, bytes(8 * n))
+        return _fill_array_fallback(out, n)
+
+    if out is None:
+        out = np.empty(n, dtype=dtype)
+    if n == 0:
+        return out
+    out[0] = 0
+    if n > 1:
+        out[1] = 1
+
+    length = min(n, 2)
+    with np.errstate(over="ignore"):
+        while length < n:
+            f_len_minus_1 = out[length - 1]
+            f_len = f_len_minus_1 + out[length - 2]
+            out[length] = f_len
+            end = min(2 * length, n)
+            # out[length + i] for i in 1..end-length-1
+            span = end - length - 1
+            if span > 0:
+                out[length + 1:end] = f_len * out[2:span + 2] + f_len_minus_1 * out[1:span + 1]
+            length = end
+    return out
+
+
+def fibonacci_chunks(n, chunk_size=1_000_000, mode="mod64"):
+    """
+    Yield the first n Fibonacci numbers as fixed-width chunks.
+    Each chunk is a numpy array (or array.array without numpy) of at
+    most chunk_size terms, so memory stays bounded while streaming.
+    With numpy each chunk is computed in one vectorized step from the
+    pair that starts it: G(j) = a * F(j - 1) + b * F(j).
+    """
+    _check_bulk_mode(mode)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    dtype, typecode = BULK_MODES[mode]
+
+    if np is None:
+        a, b = 0, 1
+        mask = 2**64 - 1
+        for start in range(0, n, chunk_size):
+            count = min(chunk_size, n - start)
+            chunk = array.array(typecode, bytes(8 * count))
+            for i in range(count):
+                chunk[i] = a if typecode == "Q" else _as_float(a)
+                a, b = b, (a + b) & mask if typecode == "Q" else a + b
+            yield chunk
+        return
+
+    # base[j] = F(j) for j = 0..chunk_size, base_prev[j] = F(j - 1) with F(-1) = 1
+    base = fibonacci_array(chunk_size + 1, mode)
+    base_prev = np.empty(chunk_size + 1, dtype=dtype)
+    base_prev[0] = 1
+    base_prev[1:] = base[:-1]
+
+    a = base.dtype.type(0)
+    b = base.dtype.type(1)
+    with np.errstate(over="ignore", invalid="ignore"):
+        for start in range(0, n, chunk_size):
+            count = min(chunk_size, n - start)
+            chunk = a * base_prev[:count] + b * base[:count]
+            if mode == "float64":
+                # Past F(1476) the terms are inf and inf * 0 gives NaN. G(0) is
+                # the start value itself; any other NaN term is beyond the
+                # double range, so it saturates to inf
+                chunk[0] = a
+                chunk[np.isnan(chunk)] = np.inf
+            yield chunk
+            # Pair starting the next chunk: G(count), G(count + 1)
+            a, b = (a * base_prev[count] + b * base[count],
+                    a * base[count] + b * (base[count] + base_prev[count]))
+            if mode == "float64":
+                a = np.inf if np.isnan(a) else a
+                b = np.inf if np.isnan(b) else b
+
+
+def demo():
+    """Interactive demo of the different Fibonacci implementations."""
     print("Fibonacci Sequence Calculator")
     print("=" * 40)
     
@@ -104,37 +552,165 @@ def main():
     print()
     
     # Method 3: Individual calculations
-    print(f"\nIndividual calculations (using iterative method):")
-    for i in range(n):
-        result = fibonacci_iterative(i)
+    print(f"\nIndividual calculations (using range method):")
+    for i, result in enumerate(fibonacci_range(0, n)):
         print(f"F({i}) = {result}")
     
     # Performance comparison for larger numbers
     if n >= 20:
-        print(f"\nPerformance comparison for F({n-1}):")
-        
-        import time
+        print(f"\nPerformance comparison for F({n-1}) (median of 5 runs, fresh caches):")
         
-        # Iterative method
-        start_time = time.time()
-        result_iter = fibonacci_iterative(n - 1)
-        iter_time = time.time() - start_time
-        print(f"Iterative: F({n-1}) = {result_iter} (Time: {iter_time:.6f}s)")
+        from fibonacci_benchmark import METHODS, summarize, time_samples
         
-        # Memoized method
-        start_time = time.time()
-        result_memo = fibonacci_memoized(n - 1)
-        memo_time = time.time() - start_time
-        print(f"Memoized: F({n-1}) = {result_memo} (Time: {memo_time:.6f}s)")
-        
-        # Recursive method (only for smaller numbers to avoid long wait)
-        if n <= 30:
-            start_time = time.time()
-            result_rec = fibonacci_recursive(n - 1)
-            rec_time = time.time() - start_time
-            print(f"Recursive: F({n-1}) = {result_rec} (Time: {rec_time:.6f}s)")
+        for name in ("iterative", "fast_doubling", "memoized", "recursive"):
+            setup, max_n = METHODS[name]
+            if max_n is not None and n - 1 > max_n:
+                print(f"{name.replace('_', ' ').capitalize()}: skipped for large numbers (too slow)")
+                continue
+            stats = summarize(time_samples(setup, n - 1, warmup=1, repeats=5))
+            print(f"{name.replace('_', ' ').capitalize()}: {stats['median_ns'] / 1e6:.6f} ms")
+        print("Run fibonacci_benchmark.py for the full suite and a JSON report.")
+
+
+STREAM_METHODS = ["generator", "range", "chunks"]
+STREAM_FORMATS = ["text", "jsonl", "binary"]
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _stream_terms(start, count, method, mod, workers):
+    """
+    Yield blocks of consecutive terms F(start), ..., F(start + count - 1).
+    Blocks are lists of ints, or numpy/array.array buffers for "chunks".
+    Every term is computed exactly once.
+    """
+    if method == "chunks":
+        # Fixed-width mod 2^64 buffers; skip the first start terms
+        skipped = 0
+        for chunk in fibonacci_chunks(start + count, chunk_size=1 << 16, mode="mod64"):
+            if skipped + len(chunk) <= start:
+                skipped += len(chunk)
+                continue
+            yield chunk[max(start - skipped, 0):]
+            skipped += len(chunk)
+        return
+
+    if method == "range":
+        terms = fibonacci_range(start, start + count, workers=workers)
+        if mod is not None:
+            terms = (term % mod for term in terms)
+    else:
+        def generate():
+            if mod is not None:
+                a, b = _fast_doubling_pair_mod(start, mod)
+                for _ in range(count):
+                    yield a
+                    a, b = b, (a + b) % mod
+            else:
+                a, b = _fast_doubling_pair(start, use_gmpy=False)
+                a, b = int(a), int(b)
+                for _ in range(count):
+                    yield a
+                    a, b = b, a + b
+        terms = generate()
+
+    block = []
+    for term in terms:
+        block.append(term)
+        if len(block) == 4096:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _write_block(writer, block, index, fmt, fixed_width):
+    """Write one block of terms starting at F(index); returns the next index."""
+    if fmt == "binary" and fixed_width:
+        if np is not None and isinstance(block, np.ndarray):
+            writer.write(block.astype("<u8", copy=False).tobytes())
         else:
-            print("Recursive method skipped for large numbers (too slow)")
+            writer.write(b"".join(int(term).to_bytes(8, "little") for term in block))
+        return index + len(block)
+
+    values = block.tolist() if hasattr(block, "tolist") else block
+    if fmt == "binary":
+        # Length-prefixed little-endian magnitudes for unbounded integers
+        parts = []
+        for term in values:
+            raw = term.to_bytes((term.bit_length() + 7) // 8, "little")
+            parts.append(len(raw).to_bytes(4, "little"))
+            parts.append(raw)
+        writer.write(b"".join(parts))
+    elif fmt == "jsonl":
+        # Terms are plain ints, so formatting directly matches json.dumps output
+        writer.write("".join(
+            f'{{"n": {index + offset}, "value": {term}}}\n'
+            for offset, term in enumerate(values)
+        ).encode())
+    else:
+        writer.write(("\n".join(map(str, values)) + "\n").encode())
+    return index + len(values)
+
+
+def stream_to(writer, n, start=0, method="generator", mod=None, fmt="text", workers=None):
+    """
+    Stream F(start), ..., F(start + n - 1) to a binary writer.
+    Formats: "text" writes one decimal term per line, "jsonl" one
+    {"n": i, "value": F(i)} object per line, and "binary" writes
+    8-byte little-endian words when every term fits (--mod <= 2^64 or
+    method "chunks"), otherwise a 4-byte length followed by the term's
+    little-endian bytes. Terms are never held in memory all at once.
+    """
+    if method == "chunks" and mod not in (None, 2**64):
+        raise ValueError('method "chunks" always computes terms mod 2^64')
+    fixed_width = method == "chunks" or (mod is not None and mod <= 2**64)
+
+    index = start
+    for block in _stream_terms(start, n, method, mod, workers):
+        index = _write_block(writer, block, index, fmt, fixed_width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calculate Fibonacci numbers. Without --n, runs the interactive demo."
+    )
+    parser.add_argument("--n", type=int, help="Number of terms to emit")
+    parser.add_argument("--start", type=int, default=0, help="Index of the first term (default: 0)")
+    parser.add_argument("--method", choices=STREAM_METHODS, default="generator",
+                        help="generator: sequential; range: parallel process pool; "
+                             "chunks: vectorized mod 2^64 buffers (default: generator)")
+    parser.add_argument("--mod", type=int, help="Emit F(i) mod this value")
+    parser.add_argument("--format", choices=STREAM_FORMATS, default="text", help="Output format (default: text)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --method range (default: CPU count)")
+    parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.n is None:
+        demo()
+        return
+
+    if args.n < 0 or args.start < 0:
+        parser.error("--n and --start must be non-negative")
+    if args.mod is not None and args.mod < 1:
+        parser.error("--mod must be positive")
+    if args.method == "chunks" and args.mod not in (None, 2**64):
+        parser.error('--method chunks always computes terms mod 2^64')
+
+    # Large terms exceed the default limit on int-to-decimal conversion
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+    if args.output:
+        writer = open(args.output, "wb", buffering=WRITE_BUFFER_SIZE)
+    else:
+        writer = io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "wb", closefd=False), WRITE_BUFFER_SIZE)
+
+    try:
+        with writer:
+            stream_to(writer, args.n, args.start, args.method, args.mod, args.format, args.workers)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); exit quietly
+        sys.stderr.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Fibonacci Benchmark Suite
+Times the implementations in Fibonacci.py with perf_counter_ns, warm-up
+runs, repeated samples and fresh caches per sample, sweeps over n, tracks
+peak memory with tracemalloc and writes a JSON report. Two reports can be
+compared to catch regressions between versions.
+
+Examples:
+    python fibonacci_benchmark.py --output results/baseline.json
+    python fibonacci_benchmark.py --output results/new.json --compare results/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import Fibonacci as fib
+
+DEFAULT_SIZES = [10, 100, 1000, 10_000, 100_000]
+DEFAULT_MODULUS = 10**9 + 7
+
+
+def _setup_memoized(n):
+    # A fresh cache per sample, so no sample benefits from an earlier one
+    cache = fib.FibonacciCache()
+    return lambda: fib.fibonacci_memoized(n, cache=cache)
+
+
+def _setup_mod(n):
+    fib.pisano_period.cache_clear()
+    return lambda: fib.fibonacci_mod(n, DEFAULT_MODULUS)
+
+
+# name -> (setup(n) returning a zero-argument callable, largest n to run)
+METHODS = {
+    "iterative": (lambda n: lambda: fib.fibonacci_iterative(n), 1_000_000),
+    "memoized": (_setup_memoized, None),
+    "recursive": (lambda n: lambda: fib.fibonacci_recursive(n), 30),
+    "fast_doubling": (lambda n: lambda: fib.fibonacci_fast_doubling(n, use_gmpy=False), None),
+    "mod": (_setup_mod, None),
+    "sequence": (lambda n: lambda: fib.fibonacci_sequence(n), 100_000),
+    "generator": (lambda n: lambda: sum(1 for _ in fib.fibonacci_generator(n)), 100_000),
+    "array_mod64": (lambda n: lambda: fib.fibonacci_array(n, "mod64"), None),
+}
+
+
+def time_samples(setup, n, warmup, repeats):
+    """Return per-sample durations in nanoseconds; setup runs untimed before each sample."""
+    for _ in range(warmup):
+        setup(n)()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            func = setup(n)
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def peak_memory(setup, n):
+    """Return the peak bytes allocated during one call, measured with tracemalloc."""
+    func = setup(n)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "min_ns": ordered[0],
+        "median_ns": statistics.median(ordered),
+        "mean_ns": statistics.fmean(ordered),
+        "stdev_ns": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p90_ns": ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))],
+        "samples": len(ordered),
+    }
+
+
+def run_suite(methods, sizes, warmup=2, repeats=10, track_memory=True):
+    """Benchmark every method at every size it supports and return the report dict."""
+    results = []
+    for name in methods:
+        setup, max_n = METHODS[name]
+        for n in sizes:
+            if max_n is not None and n > max_n:
+                continue
+            entry = {"method": name, "n": n}
+            entry.update(summarize(time_samples(setup, n, warmup, repeats)))
+            if track_memory:
+                entry["peak_bytes"] = peak_memory(setup, n)
+            results.append(entry)
+            print(f"{name:>14} n={n:<9} median={entry['median_ns'] / 1e6:10.3f} ms"
+                  + (f"  peak={entry['peak_bytes'] / 1024:10.1f} KiB" if track_memory else ""),
+                  file=sys.stderr)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "gmpy2": fib.gmpy2 is not None,
+            "numpy": fib.np is not None,
+            "warmup": warmup,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare_reports(baseline, current, threshold=0.10):
+    """
+    Compare median times of two reports.
+    Returns a list of (method, n, baseline_ns, current_ns, change) for
+    every entry whose median got slower by more than threshold.
+    """
+    baseline_index = {(r["method"], r["n"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = baseline_index.get((result["method"], result["n"]))
+        if previous is None or previous["median_ns"] == 0:
+            continue
+        change = result["median_ns"] / previous["median_ns"] - 1
+        if change > threshold:
+            regressions.append((result["method"], result["n"], previous["median_ns"], result["median_ns"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fibonacci implementations")
+    parser.add_argument("--methods", nargs="+", choices=sorted(METHODS), default=sorted(METHODS),
+                        help="Methods to benchmark (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help="Values of n to sweep (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed warm-up calls (default: 2)")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed samples per point (default: 10)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip peak-memory tracking")
+    parser.add_argument("--output", "-o", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown before a point counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    report = run_suite(args.methods, args.sizes, args.warmup, args.repeats, not args.no_memory)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        for method, n, before, after, change in regressions:
+            print(f"REGRESSION {method} n={n}: {before / 1e6:.3f} ms -> {after / 1e6:.3f} ms (+{change:.0%})",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions found.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
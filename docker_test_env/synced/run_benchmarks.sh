@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Run the benchmark suites and store their JSON reports in ./results.
+# Meant to run inside the "bench" compose service, but works anywhere.
+#
+# Environment:
+#   BENCH_ARGS      Extra arguments for fibonacci_benchmark.py (e.g. "--sizes 1000 100000")
+#   BENCH_BASELINE  Report under results/ to compare against; exits non-zero on regressions
+set -euo pipefail
+
+cd "$(dirname "$0")"
+mkdir -p results
+
+stamp="$(date -u +%Y%m%dT%H%M%SZ)"
+report="results/fibonacci-${stamp}.json"
+
+echo "Python: $(python --version 2>&1)"
+echo "CPUs visible: $(nproc)"
+python -c "import Fibonacci; Fibonacci.verify_fast_doubling()" && echo "Correctness check passed"
+
+compare_args=()
+if [[ -n "${BENCH_BASELINE:-}" ]]; then
+    compare_args=(--compare "results/${BENCH_BASELINE}")
+fi
+
+# shellcheck disable=SC2086
+python fibonacci_benchmark.py --output "$report" ${BENCH_ARGS:-} ${compare_args[@]+"${compare_args[@]}"}
+
+ln -sf "$(basename "$report")" results/latest.json
+echo "Report written to ${report}"
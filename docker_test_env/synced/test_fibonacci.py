@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+import Fibonacci
+
+
+def _expected_float64(n):
+    """Correctly rounded F(i) for i < n, inf past the double range"""
+    return [Fibonacci._as_float(Fibonacci.fibonacci_iterative(i)) for i in range(n)]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000, 1476, 1477, 2000])
+def test_float64_chunks_saturate_to_inf(chunk_size):
+    pytest.importorskip("numpy")
+    values = [float(x) for chunk in Fibonacci.fibonacci_chunks(3000, chunk_size, mode="float64") for x in chunk]
+
+    assert not any(math.isnan(x) for x in values)
+    assert math.isfinite(values[1476])
+    assert all(math.isinf(x) for x in values[1477:])
+    assert values[:1477] == pytest.approx(_expected_float64(1477), rel=1e-12)
+
+
+def test_float64_array_saturates_to_inf():
+    values = [float(x) for x in Fibonacci.fibonacci_array(3000, mode="float64")]
+
+    assert not any(math.isnan(x) for x in values)
+    assert all(math.isinf(x) for x in values[1477:])
+
+
+def test_float64_without_numpy(monkeypatch):
+    monkeypatch.setattr(Fibonacci, "np", None)
+    expected = _expected_float64(3000)
+
+    assert list(Fibonacci.fibonacci_array(3000, mode="float64")) == expected
+    chunks = Fibonacci.fibonacci_chunks(3000, 1000, mode="float64")
+    assert [x for chunk in chunks for x in chunk] == expected
+
+
+def test_mod64_chunks_match_array():
+    expected = [Fibonacci.fibonacci_iterative(i) % 2**64 for i in range(3000)]
+
+    assert [int(x) for x in Fibonacci.fibonacci_array(3000)] == expected
+    assert [int(x) for chunk in Fibonacci.fibonacci_chunks(3000, 1000) for x in chunk] == expected
@@ -0,0 +1,103 @@
+"""
+Audio filter graph helpers for the FFmpeg based apps.
+
+Builds a single ``-af`` chain out of the selected processing options so every
+combination is applied in one decode/encode pass, and implements the two-pass
+EBU R128 ``loudnorm`` workflow (measure first, then apply).
+"""
+
+import json
+import re
+
+from shared_resources import run_ffmpeg
+
+# EBU R128 targets used by both loudnorm modes
+LOUDNORM_TARGETS = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+
+SILENCE_REMOVE_FILTER = "silenceremove=start_periods=1:start_duration=1:start_threshold=-50dB"
+
+FADE_DURATION = 1.0
+
+
+def _loudnorm_filter(measured=None):
+    """Build a loudnorm filter, either single-pass or using measured values"""
+    params = [f"{key}={value}" for key, value in LOUDNORM_TARGETS.items()]
+    if measured is not None:
+        params.extend([
+            f"measured_I={measured['input_i']}",
+            f"measured_TP={measured['input_tp']}",
+            f"measured_LRA={measured['input_lra']}",
+            f"measured_thresh={measured['input_thresh']}",
+            f"offset={measured['target_offset']}",
+            "linear=true",
+        ])
+    return "loudnorm=" + ":".join(params)
+
+
+def build_audio_filter_graph(normalize=False, remove_silence=False, fade=False,
+                             duration=None, loudnorm_measured=None):
+    """
+    Chain the selected audio filters into a single filter graph.
+
+    Args:
+        normalize: Apply loudnorm (single-pass unless measured values are given)
+        remove_silence: Trim leading silence
+        fade: Add a fade in and, when the duration is known, a fade out
+        duration: Input duration in seconds, needed to place the fade out
+        loudnorm_measured: Values returned by measure_loudness() for two-pass mode
+
+    Returns:
+        The filter string for ``-af``, or None when no filter is selected.
+    """
+    filters = []
+
+    # The fade out is placed on the input timeline, before silence removal
+    # shortens it, so its start time is known from the probed duration
+    if fade and duration and duration > 2 * FADE_DURATION:
+        fade_start = duration - FADE_DURATION
+        filters.append(f"afade=t=out:st={fade_start:.3f}:d={FADE_DURATION}")
+
+    # Silence removal goes before loudnorm so loudness is measured on what is kept
+    if remove_silence:
+        filters.append(SILENCE_REMOVE_FILTER)
+
+    if normalize:
+        filters.append(_loudnorm_filter(loudnorm_measured))
+
+    if fade:
+        filters.append(f"afade=t=in:st=0:d={FADE_DURATION}")
+
+    return ",".join(filters) if filters else None
+
+
+def measure_loudness(input_path, remove_silence=False):
+    """
+    Run the analysis pass of two-pass loudnorm.
+
+    Decodes audio only (``-vn``) into the null muxer, so nothing is encoded.
+
+    Returns:
+        Dict with the measured input_i, input_tp, input_lra, input_thresh and
+        target_offset values.
+    """
+    filters = []
+    if remove_silence:
+        filters.append(SILENCE_REMOVE_FILTER)
+    params = [f"{key}={value}" for key, value in LOUDNORM_TARGETS.items()]
+    filters.append("loudnorm=" + ":".join(params) + ":print_format=json")
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", input_path,
+        "-vn", "-af", ",".join(filters),
+        "-f", "null", "-",
+    ]
+    result = run_ffmpeg(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Loudness analysis failed: {result.stderr}")
+
+    # loudnorm prints its JSON summary as the last {...} block on stderr
+    matches = re.findall(r"\{[^{}]*\}", result.stderr)
+    if not matches:
+        raise RuntimeError("Loudness analysis produced no measurement")
+    return json.loads(matches[-1])
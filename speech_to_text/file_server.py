@@ -0,0 +1,183 @@
+"""
+Local streaming file server for conversion results.
+
+Streamlit's ``st.download_button`` needs the whole file in memory on every
+script rerun. Instead, finished outputs are registered here and served by a
+small threaded HTTP sidecar that streams them with ``sendfile`` and supports
+HTTP range requests, so the page only has to render a link.
+
+Configuration (environment variables):
+    FILE_SERVER_HOST: Interface to bind (default: 127.0.0.1)
+    FILE_SERVER_PORT: Port to bind (default: 0, any free port)
+    FILE_SERVER_PUBLIC_URL: Base URL used in links, e.g. when behind a proxy
+"""
+
+import os
+import re
+import secrets
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+CHUNK_SIZE = 1024 * 1024
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class _FileRequestHandler(BaseHTTPRequestHandler):
+    """Serves registered files at /files/<token>"""
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        # Keep the Streamlit console clean
+        pass
+
+    def _serve(self, send_body):
+        token = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        entry = self.server.file_server.lookup(token) if self.path.startswith("/files/") else None
+        if entry is None or not os.path.exists(entry["path"]):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        file_size = os.path.getsize(entry["path"])
+        start, end = 0, file_size - 1
+        status = HTTPStatus.OK
+
+        range_header = self.headers.get("Range")
+        if range_header and file_size > 0:
+            match = _RANGE_PATTERN.match(range_header.strip())
+            if match is None or match.groups() == ("", ""):
+                self._send_range_not_satisfiable(file_size)
+                return
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(int(last), file_size - 1) if last else file_size - 1
+            else:
+                # Suffix range: the last N bytes
+                start = max(file_size - int(last), 0)
+            if start > end or start >= file_size:
+                self._send_range_not_satisfiable(file_size)
+                return
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        length = end - start + 1
+        self.send_response(status)
+        self.send_header("Content-Type", entry["mime"])
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header(
+            "Content-Disposition",
+            f"attachment; filename*=UTF-8''{quote(entry['filename'])}"
+        )
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+        self.end_headers()
+
+        if not send_body or length <= 0:
+            return
+
+        with open(entry["path"], "rb") as file:
+            try:
+                # Zero-copy transfer where the platform supports it
+                self.connection.sendfile(file, offset=start, count=length)
+                return
+            except AttributeError:
+                file.seek(start)
+            except OSError:
+                # sendfile leaves the file position after the bytes it sent;
+                # resume from there so no byte is sent twice
+                if file.tell() < start:
+                    file.seek(start)
+            remaining = start + length - file.tell()
+            while remaining > 0:
+                chunk = file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def _send_range_not_satisfiable(self, file_size):
+        self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.send_header("Content-Range", f"bytes */{file_size}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FileServer:
+    """Background HTTP server that streams registered files by token"""
+
+    def __init__(self, host=None, port=None, public_url=None):
+        self.host = host or os.environ.get("FILE_SERVER_HOST", "127.0.0.1")
+        self.port = int(port if port is not None else os.environ.get("FILE_SERVER_PORT", 0))
+        self.public_url = public_url or os.environ.get("FILE_SERVER_PUBLIC_URL")
+        self._files = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def start(self):
+        """Bind the server and serve requests on a daemon thread"""
+        if self._httpd is not None:
+            return
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _FileRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.file_server = self
+        self.port = self._httpd.server_address[1]
+        thread = threading.Thread(target=self._httpd.serve_forever, name="file-server", daemon=True)
+        thread.start()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def base_url(self):
+        if self.public_url:
+            return self.public_url.rstrip("/")
+        host = "localhost" if self.host in ("127.0.0.1", "0.0.0.0") else self.host
+        return f"http://{host}:{self.port}"
+
+    def register(self, path, filename, mime="application/octet-stream"):
+        """
+        Make a file downloadable.
+
+        Returns:
+            The token identifying the file; pass it to url_for().
+        """
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._files[token] = {"path": path, "filename": filename, "mime": mime}
+        return token
+
+    def unregister(self, token):
+        with self._lock:
+            self._files.pop(token, None)
+
+    def lookup(self, token):
+        with self._lock:
+            return self._files.get(token)
+
+    def url_for(self, token):
+        return f"{self.base_url}/files/{token}"
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_file_server():
+    """Return the process-wide file server, starting it on first use"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = FileServer()
+            _server.start()
+        return _server
@@ -0,0 +1,154 @@
+"""
+Cached spoken-language detection.
+
+Whisper detects the language of every file it is given without one, which
+costs a mel computation plus an encoder pass per file. Here detection runs on
+the first PREFIX_SECONDS of audio only (Whisper's detection never looks past
+its first 30 second window), and the result is cached by a hash of the file
+contents, so a file is detected once no matter how often it is transcribed.
+Transcriptions are then run with a fixed language, and batches can be grouped
+by it.
+
+Configuration (environment variables):
+    LANGUAGE_CACHE_PATH: JSON file holding detected languages
+        (default: ~/.cache/speech_to_text/languages.json)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from shared_resources import run_ffmpeg
+
+# Whisper decodes in 30 second windows; language detection only uses the first
+PREFIX_SECONDS = 30
+SAMPLE_RATE = 16000
+
+
+def content_hash(source):
+    """BLAKE2b hex digest of a file path's contents, or of bytes"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_audio_prefix(path, seconds=PREFIX_SECONDS):
+    """Decode only the first seconds of a file to 16 kHz mono float32"""
+    import numpy as np
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-t", str(seconds), "-i", str(path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-",
+    ]
+    result = run_ffmpeg(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {result.stderr.decode(errors='replace')}")
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def detect_language(model, audio):
+    """
+    Run Whisper language detection on the start of a decoded array.
+
+    Returns:
+        Tuple of (language code, probability).
+    """
+    import whisper
+
+    if not model.is_multilingual:
+        return "en", 1.0
+    segment = whisper.pad_or_trim(audio[:PREFIX_SECONDS * SAMPLE_RATE])
+    mel = whisper.log_mel_spectrogram(segment, model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    language = max(probs, key=probs.get)
+    return language, float(probs[language])
+
+
+class LanguageCache:
+    """Detected languages keyed by content hash, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self._entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._entries))
+            os.replace(tmp_path, self.path)
+
+    def detect(self, model, key, load_audio):
+        """
+        Language of the content identified by key, detecting it on a cache miss.
+
+        Args:
+            model: Loaded Whisper model used on a miss
+            key: Content hash (see content_hash)
+            load_audio: Callable returning the decoded audio (at least its
+                first PREFIX_SECONDS); only called on a miss
+
+        Returns:
+            Dict with language, probability, seconds (time spent here,
+            including the lookup) and cached.
+        """
+        start = time.perf_counter()
+        entry = self.get(key)
+        if entry is not None:
+            return {**entry, "seconds": time.perf_counter() - start, "cached": True}
+
+        language, probability = detect_language(model, load_audio())
+        entry = {"language": language, "probability": probability}
+        self.put(key, entry)
+        return {**entry, "seconds": time.perf_counter() - start, "cached": False}
+
+    def detect_file(self, model, path):
+        """detect() for a media file, decoding only its prefix on a miss"""
+        return self.detect(model, content_hash(path), lambda: load_audio_prefix(path))
+
+
+def group_by_language(detections):
+    """
+    Group items by detected language, largest group first.
+
+    Args:
+        detections: Iterable of (item, language) pairs, in processing order
+
+    Returns:
+        List of (language, [items]) with each group keeping the input order.
+    """
+    groups = {}
+    for item, language in detections:
+        groups.setdefault(language, []).append(item)
+    return sorted(groups.items(), key=lambda group: len(group[1]), reverse=True)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_language_cache():
+    """Return the process-wide language cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            default_path = Path.home() / ".cache" / "speech_to_text" / "languages.json"
+            _cache = LanguageCache(os.environ.get("LANGUAGE_CACHE_PATH", default_path))
+        return _cache
@@ -0,0 +1,220 @@
+"""
+Pre-flight media analysis and conversion cost estimates.
+
+``probe_media`` runs ffprobe once per input and caches the parsed result.
+``ThroughputModel`` keeps a small history of past conversions on this machine
+and uses it, together with the probe, to predict output size and conversion
+time for a preset before the job is started.
+
+Configuration (environment variables):
+    THROUGHPUT_MODEL_PATH: JSON file holding the run history
+        (default: ~/.cache/speech_to_text/throughput.json)
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from statistics import median
+
+from shared_resources import run_ffprobe
+
+# Number of recent runs per preset used for the estimates
+HISTORY_SIZE = 20
+
+# Priors used until a preset has run on this machine.
+# Seconds of conversion per second of media, per output megapixel for video
+DEFAULT_SECONDS_PER_MEDIA_SECOND = {"video": 0.6, "audio": 0.02}
+
+# Approximate H.264 bits per pixel per frame for the CRF presets
+DEFAULT_BITS_PER_PIXEL = {"high": 0.20, "medium": 0.10, "low": 0.05}
+
+# Probe results kept in memory; the least recently used one is dropped first
+PROBE_CACHE_SIZE = 256
+
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+
+
+def _parse_rate(rate):
+    """Convert an ffprobe rational like '30000/1001' to a float"""
+    try:
+        numerator, denominator = rate.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else 0.0
+    except (AttributeError, ValueError):
+        return 0.0
+
+
+def _to_number(value, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_media(path, cache_key=None):
+    """
+    Read duration, streams, bitrate and resolution with ffprobe.
+
+    Args:
+        path: Media file to analyse
+        cache_key: Identity of the content; defaults to (path, size, mtime)
+
+    Returns:
+        Dict with duration, size_bytes, bit_rate and "video"/"audio" entries
+        (None when the stream is absent).
+    """
+    if cache_key is None:
+        stat = os.stat(path)
+        cache_key = (str(path), stat.st_size, stat.st_mtime_ns)
+
+    with _probe_lock:
+        if cache_key in _probe_cache:
+            _probe_cache.move_to_end(cache_key)
+            return _probe_cache[cache_key]
+
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries",
+        "format=duration,bit_rate,size:"
+        "stream=codec_type,codec_name,width,height,avg_frame_rate,bit_rate,sample_rate,channels",
+        "-of", "json",
+        str(path),
+    ]
+    result = run_ffprobe(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr}")
+    data = json.loads(result.stdout or "{}")
+    fmt = data.get("format", {})
+
+    info = {
+        "duration": _to_number(fmt.get("duration")) or 0.0,
+        "size_bytes": _to_number(fmt.get("size"), int) or os.path.getsize(path),
+        "bit_rate": _to_number(fmt.get("bit_rate"), int),
+        "video": None,
+        "audio": None,
+    }
+    for stream in data.get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type == "video" and info["video"] is None:
+            info["video"] = {
+                "codec": stream.get("codec_name"),
+                "width": _to_number(stream.get("width"), int),
+                "height": _to_number(stream.get("height"), int),
+                "fps": _parse_rate(stream.get("avg_frame_rate")),
+                "bit_rate": _to_number(stream.get("bit_rate"), int),
+            }
+        elif codec_type == "audio" and info["audio"] is None:
+            info["audio"] = {
+                "codec": stream.get("codec_name"),
+                "sample_rate": _to_number(stream.get("sample_rate"), int),
+                "channels": _to_number(stream.get("channels"), int),
+                "bit_rate": _to_number(stream.get("bit_rate"), int),
+            }
+
+    with _probe_lock:
+        _probe_cache[cache_key] = info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return info
+
+
+class ThroughputModel:
+    """Conversion speed and output size history, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self._history = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._history = {}
+
+    def record(self, preset_key, kind, media_seconds, megapixels, elapsed_seconds, output_bytes):
+        """
+        Store one finished run.
+
+        Args:
+            preset_key: Identifies the settings, e.g. "video:mp4:medium"
+            kind: "video" or "audio"
+            media_seconds: Duration of the input
+            megapixels: Output frame size in megapixels (ignored for audio)
+            elapsed_seconds: Wall time the conversion took
+            output_bytes: Size of the produced file
+        """
+        if media_seconds <= 0:
+            return
+        work = media_seconds * (megapixels if kind == "video" and megapixels else 1.0)
+        sample = {
+            "seconds_per_unit": elapsed_seconds / work,
+            "bytes_per_unit": output_bytes / work,
+        }
+        with self._lock:
+            runs = self._history.setdefault(preset_key, [])
+            runs.append(sample)
+            del runs[:-HISTORY_SIZE]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._history))
+
+    def runs(self, preset_key):
+        with self._lock:
+            return list(self._history.get(preset_key, []))
+
+    def estimate(self, preset_key, kind, media_seconds, megapixels=None, fps=None,
+                 bitrate_kbps=None, crf_preset=None):
+        """
+        Predict conversion time and output size.
+
+        Fixed-bitrate settings give the size directly from the duration. For
+        CRF presets the size comes from this preset's history, or from a
+        bits-per-pixel prior when it has never run here.
+
+        Returns:
+            Dict with seconds, output_bytes and calibrated (True when based
+            on at least one past run of this preset).
+        """
+        runs = self.runs(preset_key)
+        work = media_seconds * (megapixels if kind == "video" and megapixels else 1.0)
+
+        if runs:
+            seconds = work * median(run["seconds_per_unit"] for run in runs)
+        else:
+            seconds = work * DEFAULT_SECONDS_PER_MEDIA_SECOND[kind]
+
+        if bitrate_kbps:
+            output_bytes = media_seconds * bitrate_kbps * 1000 / 8
+        elif runs:
+            output_bytes = work * median(run["bytes_per_unit"] for run in runs)
+        elif kind == "video" and megapixels and crf_preset in DEFAULT_BITS_PER_PIXEL:
+            bits_per_second = DEFAULT_BITS_PER_PIXEL[crf_preset] * megapixels * 1e6 * (fps or 30)
+            output_bytes = media_seconds * bits_per_second / 8
+        else:
+            output_bytes = None
+
+        return {"seconds": seconds, "output_bytes": output_bytes, "calibrated": bool(runs)}
+
+
+def output_megapixels(probe, resolution="original"):
+    """Output frame size in megapixels for a "WIDTHxHEIGHT" or "original" setting"""
+    if resolution and resolution != "original":
+        width, height = (int(part) for part in resolution.split("x"))
+        return width * height / 1e6
+    video = probe.get("video") if probe else None
+    if video and video.get("width") and video.get("height"):
+        return video["width"] * video["height"] / 1e6
+    return None
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_throughput_model():
+    """Return the process-wide throughput model"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            default_path = Path.home() / ".cache" / "speech_to_text" / "throughput.json"
+            _model = ThroughputModel(os.environ.get("THROUGHPUT_MODEL_PATH", default_path))
+        return _model
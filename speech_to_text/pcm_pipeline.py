@@ -0,0 +1,146 @@
+"""
+Direct media-to-transcript pipeline.
+
+Decodes any uploaded audio or video with a single FFmpeg run straight into
+16 kHz mono float32 PCM on a pipe, and hands that array to Whisper. This
+replaces the extract-to-MP3, download, re-upload and decode-again workflow.
+"""
+
+import os
+import tempfile
+import time
+
+from shared_resources import run_ffmpeg
+from language_cache import content_hash, get_language_cache
+
+# Whisper expects 16 kHz mono float32 samples in [-1, 1]
+SAMPLE_RATE = 16000
+
+# ISO-BMFF containers may keep their index (moov atom) at the end of the
+# file, which FFmpeg cannot reach when reading from a non-seekable pipe
+SEEKABLE_INPUT_FORMATS = {"mp4", "mov", "m4a", "3gp"}
+
+
+def _pcm_command(input_spec):
+    """Build the FFmpeg command that writes raw float PCM to stdout"""
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", input_spec,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-",
+    ]
+
+
+def decode_to_pcm(data, file_extension):
+    """
+    Decode media bytes into a float32 PCM array in one FFmpeg run.
+
+    Args:
+        data: Raw bytes of the uploaded file
+        file_extension: Extension of the uploaded file, without the dot
+
+    Returns:
+        1-D numpy float32 array sampled at SAMPLE_RATE.
+    """
+    file_extension = file_extension.lower()
+    input_path = None
+
+    try:
+        if file_extension in SEEKABLE_INPUT_FORMATS:
+            # Only the input is spilled to disk; the decoded audio still goes through the pipe
+            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as input_tmp:
+                input_tmp.write(data)
+                input_path = input_tmp.name
+            result = run_ffmpeg(_pcm_command(input_path), capture_output=True)
+        else:
+            result = run_ffmpeg(_pcm_command("pipe:0"), input=data, capture_output=True)
+    finally:
+        if input_path and os.path.exists(input_path):
+            os.unlink(input_path)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {result.stderr.decode(errors='replace')}")
+
+    import numpy as np
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def transcribe_media(model, data, file_extension, language=None):
+    """
+    Decode and transcribe an uploaded file without intermediate audio files.
+
+    Without a language, it is detected on the start of the audio and cached
+    by the hash of the upload, so re-transcribing a file skips detection. If
+    that detection fails, Whisper detects the language itself.
+
+    Returns:
+        Tuple of (whisper result dict, timings dict). Timings hold
+        decode_seconds, transcribe_seconds, audio_seconds and, when the
+        language was detected here, detect_seconds and language_cached.
+    """
+    decode_start = time.perf_counter()
+    audio = decode_to_pcm(data, file_extension)
+    decode_seconds = time.perf_counter() - decode_start
+
+    detection = None
+    if language is None:
+        try:
+            detection = get_language_cache().detect(model, content_hash(data), lambda: audio)
+            language = detection["language"]
+        except Exception:
+            detection = None
+
+    transcribe_start = time.perf_counter()
+    result = model.transcribe(audio, language=language, verbose=False)
+    transcribe_seconds = time.perf_counter() - transcribe_start
+
+    timings = {
+        "decode_seconds": decode_seconds,
+        "transcribe_seconds": transcribe_seconds,
+        "audio_seconds": len(audio) / SAMPLE_RATE,
+    }
+    if detection is not None:
+        timings["detect_seconds"] = detection["seconds"]
+        timings["language_cached"] = detection["cached"]
+    return result, timings
+
+
+def measure_two_step_overhead(data, file_extension):
+    """
+    Time the legacy path's audio handling for comparison.
+
+    Runs what the two-step workflow does before inference: write the upload to
+    a temp file, extract it to an MP3, then decode that MP3 again the way
+    Whisper's loader does. The transcription itself is identical in both paths,
+    so only these stages are timed.
+
+    Returns:
+        Seconds spent on the legacy temp-file, encode and decode stages.
+    """
+    input_path = None
+    mp3_path = None
+    start = time.perf_counter()
+
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as input_tmp:
+            input_tmp.write(data)
+            input_path = input_tmp.name
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as mp3_tmp:
+            mp3_path = mp3_tmp.name
+
+        run_ffmpeg(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", input_path,
+             "-vn", "-c:a", "libmp3lame", "-b:a", "192k", mp3_path],
+            capture_output=True, check=True
+        )
+        run_ffmpeg(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", mp3_path,
+             "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+            capture_output=True, check=True
+        )
+    finally:
+        for path in (input_path, mp3_path):
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+    return time.perf_counter() - start
@@ -0,0 +1,169 @@
+"""
+Compare int8-quantized Whisper against the fp32 model on a set of audio files.
+
+The fp32 transcript of each file is the reference: the report gives the word
+error rate of the int8 transcript against it, the speed of both models
+(real-time factor and speedup) and the weight memory of each.
+
+Usage:
+    python quantization_benchmark.py --model medium --audio-dir audi_tg
+    python quantization_benchmark.py --model small --audio-dir fixtures --output int8_small.json
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import torch
+import whisper
+
+from whisper_quant import load_quantized_model, model_size_bytes
+
+AUDIO_EXTENSIONS = {".ogg", ".mp3", ".wav", ".m4a", ".flac", ".aac", ".webm", ".mp4"}
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, so WER only counts wording changes"""
+    return re.findall(r"\w+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance divided by the reference length.
+
+    Args:
+        reference: Text taken as correct
+        hypothesis: Text to score
+
+    Returns:
+        WER as a fraction (0.0 is identical); 0.0 when both are empty.
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def transcribe_timed(model, audio, language=None):
+    """Transcribe a decoded array; returns (text, seconds)"""
+    start = time.perf_counter()
+    result = model.transcribe(audio, language=language, fp16=False, verbose=None)
+    return result["text"], time.perf_counter() - start
+
+
+def run_comparison(model_name, audio_files, language=None):
+    """
+    Transcribe every file with the fp32 and the int8 model.
+
+    Returns:
+        Report dict with per-file results and totals.
+    """
+    # Decode once; both models get exactly the same samples
+    audio = {path: whisper.load_audio(str(path)) for path in audio_files}
+
+    load_start = time.perf_counter()
+    fp32_model = whisper.load_model(model_name, device="cpu")
+    fp32_load = time.perf_counter() - load_start
+    fp32_bytes = model_size_bytes(fp32_model)
+    fp32_results = {path: transcribe_timed(fp32_model, samples, language) for path, samples in audio.items()}
+    del fp32_model
+
+    load_start = time.perf_counter()
+    int8_model = load_quantized_model(model_name)
+    int8_load = time.perf_counter() - load_start
+    int8_bytes = model_size_bytes(int8_model)
+    int8_results = {path: transcribe_timed(int8_model, samples, language) for path, samples in audio.items()}
+
+    files = []
+    total_errors = 0.0
+    total_words = 0
+    for path, samples in audio.items():
+        fp32_text, fp32_seconds = fp32_results[path]
+        int8_text, int8_seconds = int8_results[path]
+        audio_seconds = len(samples) / whisper.audio.SAMPLE_RATE
+        ref_words = len(normalize_words(fp32_text))
+        wer = word_error_rate(fp32_text, int8_text)
+        total_errors += wer * ref_words
+        total_words += ref_words
+        files.append({
+            "file": str(path),
+            "audio_seconds": audio_seconds,
+            "fp32_seconds": fp32_seconds,
+            "int8_seconds": int8_seconds,
+            "fp32_rtf": fp32_seconds / audio_seconds if audio_seconds else None,
+            "int8_rtf": int8_seconds / audio_seconds if audio_seconds else None,
+            "wer": wer,
+        })
+
+    fp32_total = sum(item["fp32_seconds"] for item in files)
+    int8_total = sum(item["int8_seconds"] for item in files)
+    return {
+        "model": model_name,
+        "torch_version": torch.__version__,
+        "threads": torch.get_num_threads(),
+        "files": files,
+        "fp32_load_seconds": fp32_load,
+        "int8_load_seconds": int8_load,
+        "fp32_weight_bytes": fp32_bytes,
+        "int8_weight_bytes": int8_bytes,
+        "memory_saving": 1 - int8_bytes / fp32_bytes,
+        "fp32_seconds": fp32_total,
+        "int8_seconds": int8_total,
+        "speedup": fp32_total / int8_total if int8_total else None,
+        "wer": total_errors / total_words if total_words else 0.0,
+    }
+
+
+def print_report(report):
+    print(f"\n{'File':<30} {'Audio':>8} {'fp32 RTF':>9} {'int8 RTF':>9} {'WER':>7}")
+    for item in report["files"]:
+        print(f"{Path(item['file']).name:<30} {item['audio_seconds']:>7.1f}s "
+              f"{item['fp32_rtf'] or 0:>9.3f} {item['int8_rtf'] or 0:>9.3f} {item['wer']:>6.1%}")
+    print(f"\nModel: {report['model']} (torch {report['torch_version']}, {report['threads']} threads)")
+    print(f"Speedup: {report['speedup']:.2f}x ({report['fp32_seconds']:.1f}s -> {report['int8_seconds']:.1f}s)")
+    print(f"Weights: {report['fp32_weight_bytes'] / 2**20:.0f} MB -> {report['int8_weight_bytes'] / 2**20:.0f} MB "
+          f"({report['memory_saving']:.0%} smaller)")
+    print(f"Load time: fp32 {report['fp32_load_seconds']:.1f}s, int8 {report['int8_load_seconds']:.1f}s")
+    print(f"WER of int8 vs fp32: {report['wer']:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare int8 and fp32 Whisper on CPU")
+    parser.add_argument("--model", default="medium", help="Whisper model size (default: medium)")
+    parser.add_argument("--audio-dir", default="audi_tg", help="Directory of fixture audio files")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N files")
+    parser.add_argument("--language", default=None, help="Force a language instead of auto-detect")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    audio_files = sorted(p for p in Path(args.audio_dir).iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+    if args.limit:
+        audio_files = audio_files[:args.limit]
+    if not audio_files:
+        parser.error(f"No audio files found in '{args.audio_dir}'")
+
+    report = run_comparison(args.model, audio_files, language=args.language)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Rendition ladder helpers for the video converter.
+
+Builds one FFmpeg command that decodes the source once and fans the decoded
+frames out with ``split`` into one ``scale`` branch per resolution, so every
+selected resolution/format pair is encoded by a single process. Also
+measures how long decoding the source takes, to report the time saved
+against one conversion run per rendition, and bundles the outputs in a zip.
+"""
+
+import time
+import zipfile
+
+from shared_resources import run_ffmpeg
+
+# Ladder rungs offered in the UI, by output height
+LADDER_HEIGHTS = {"1080p": 1080, "720p": 720, "480p": 480, "360p": 360}
+
+# Seconds of the source decoded to measure its decode speed
+DECODE_SAMPLE_SECONDS = 10
+
+QUALITY_ARGS = {
+    "high": ["-crf", "18", "-preset", "slow"],
+    "medium": ["-crf", "23", "-preset", "medium"],
+    "low": ["-crf", "28", "-preset", "fast"],
+}
+
+CODEC_ARGS = {
+    "mp4": ["-c:v", "libx264", "-c:a", "aac"],
+    "webm": ["-c:v", "libvpx-vp9", "-c:a", "libopus"],
+    "avi": ["-c:v", "libx264", "-c:a", "mp3"],
+}
+
+
+def encoder_args(output_format, quality_preset, video_bitrate=None, audio_bitrate=None):
+    """Quality and codec options for one output, as used by the converter presets"""
+    if quality_preset == "custom":
+        args = ["-b:v", f"{video_bitrate}k", "-b:a", f"{audio_bitrate}k"]
+    else:
+        args = list(QUALITY_ARGS.get(quality_preset, []))
+    return args + CODEC_ARGS.get(output_format, [])
+
+
+def ladder_renditions(source_height, labels, formats):
+    """
+    Resolution/format pairs to encode, highest resolution first.
+
+    Rungs taller than the source are left out instead of being upscaled.
+
+    Returns:
+        Tuple of (renditions, skipped_labels); each rendition is a dict
+        with label, height and format.
+    """
+    renditions = []
+    skipped = []
+    for label in sorted(labels, key=lambda name: -LADDER_HEIGHTS[name]):
+        height = LADDER_HEIGHTS[label]
+        if source_height and height > source_height:
+            skipped.append(label)
+            continue
+        for output_format in formats:
+            renditions.append({"label": label, "height": height, "format": output_format})
+    return renditions, skipped
+
+
+def rung_resolution(video_info, height):
+    """"WIDTHxHEIGHT" of a rung, keeping the source aspect ratio (or "original" if unknown)"""
+    if not video_info or not video_info.get("width") or not video_info.get("height"):
+        return "original"
+    width = round(video_info["width"] * height / video_info["height"] / 2) * 2
+    return f"{width}x{height}"
+
+
+def build_ladder_command(input_path, renditions, quality_preset, video_bitrate=None,
+                         audio_bitrate=None, remove_audio=False, faststart=False,
+                         preserve_metadata=True):
+    """
+    FFmpeg command encoding all renditions from a single decode.
+
+    Each rendition dict needs height, format and the output path in "path".
+    The video is split once per distinct height and each branch is scaled
+    (width follows the aspect ratio, kept even for the encoders); a scaled
+    branch feeding several formats is split again, so no height is scaled
+    twice.
+    """
+    heights = []
+    for rendition in renditions:
+        if rendition["height"] not in heights:
+            heights.append(rendition["height"])
+
+    branches = "".join(f"[s{i}]" for i in range(len(heights)))
+    filters = [f"[0:v:0]split={len(heights)}{branches}"]
+    for i, height in enumerate(heights):
+        outputs = "".join(
+            f"[v{j}]" for j, rendition in enumerate(renditions) if rendition["height"] == height
+        )
+        filters.append(f"[s{i}]scale=-2:{height},split={outputs.count('[')}{outputs}")
+
+    cmd = ["ffmpeg", "-y", "-i", input_path, "-filter_complex", ";".join(filters)]
+    for i, rendition in enumerate(renditions):
+        cmd.extend(["-map", f"[v{i}]"])
+        if remove_audio:
+            cmd.append("-an")
+        else:
+            cmd.extend(["-map", "0:a?"])
+        cmd.extend(encoder_args(rendition["format"], quality_preset, video_bitrate, audio_bitrate))
+        if faststart:
+            cmd.extend(["-movflags", "+faststart"])
+        if not preserve_metadata:
+            cmd.extend(["-map_metadata", "-1"])
+        cmd.append(rendition["path"])
+    return cmd
+
+
+def measure_decode_seconds(input_path, duration, sample_seconds=DECODE_SAMPLE_SECONDS):
+    """
+    Estimate how long decoding the whole video stream takes.
+
+    Decodes only the first sample_seconds to a null output and scales the
+    time to the full duration. Returns None if the sample cannot be decoded.
+    """
+    if not duration:
+        return None
+    sample = min(sample_seconds, duration)
+    cmd = ["ffmpeg", "-v", "error", "-t", str(sample), "-i", input_path,
+           "-map", "0:v:0", "-f", "null", "-"]
+    start = time.perf_counter()
+    result = run_ffmpeg(cmd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    return elapsed * duration / sample
+
+
+def bundle_renditions(zip_path, files):
+    """
+    Write (path, name) pairs into a zip archive.
+
+    The videos are already compressed, so they are stored without deflate.
+    """
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, name in files:
+            archive.write(path, arcname=name)
+    return zip_path
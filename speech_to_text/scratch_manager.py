@@ -0,0 +1,290 @@
+"""
+Managed scratch area for conversion inputs and outputs.
+
+Every browser session gets its own directory under a shared scratch root.
+A global quota and a free-disk reserve are checked before a job is admitted,
+and a background reaper deletes session directories that have been idle for
+longer than the TTL, so abandoned sessions no longer fill /tmp.
+
+Usage is tracked per file as files are created, staged, released and
+removed, so admission checks and the metrics shown on every rerun never walk
+the scratch tree. Files under the root are scanned once at startup.
+
+Configuration (environment variables):
+    SCRATCH_DIR: Scratch root (default: <system temp>/streamlit_scratch)
+    SCRATCH_QUOTA_MB: Total size allowed under the root (default: 10000)
+    SCRATCH_MIN_FREE_MB: Free disk space always kept available (default: 1000)
+    SCRATCH_TTL_MINUTES: Idle time before a session is reaped (default: 60)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+class AdmissionError(Exception):
+    """Raised when a job would exceed the scratch quota or fill the disk"""
+
+
+def _tree_size(path):
+    """Total size in bytes of all files below path"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                # File removed while walking
+                pass
+    return total
+
+
+class ScratchManager:
+    """Per-session scratch directories with quota, admission control and TTL reaping"""
+
+    def __init__(self, root, quota_bytes, min_free_bytes, ttl_seconds, reap_interval=60):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.min_free_bytes = min_free_bytes
+        self.ttl_seconds = ttl_seconds
+        self.reap_interval = reap_interval
+
+        self._lock = threading.Lock()
+        self._reserved = {}
+        self._staged = {}
+        self._file_sizes = {}
+        self._usage_bytes = 0
+        self._reclaimed_bytes_total = 0
+        self._reaped_sessions_total = 0
+        self._rejected_jobs_total = 0
+        self._reaper = None
+
+        # Files left by a previous process count against the quota too
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                self._track(os.path.join(dirpath, name))
+
+    def _track(self, path):
+        """Record the current size of a scratch file (dropping it if it is gone)"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        with self._lock:
+            self._usage_bytes -= self._file_sizes.pop(path, 0)
+            if size is not None:
+                self._file_sizes[path] = size
+                self._usage_bytes += size
+
+    def session_dir(self, session_id):
+        """Return the session's directory, creating it and marking it active"""
+        path = self.root / session_id
+        path.mkdir(exist_ok=True)
+        self.touch(session_id)
+        return path
+
+    def touch(self, session_id):
+        """Record activity; the directory mtime is the session's last-seen time"""
+        path = self.root / session_id
+        if path.exists():
+            os.utime(path)
+
+    def create_file(self, session_id, suffix=""):
+        """Create an empty file owned by the session and return its path"""
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.session_dir(session_id))
+        os.close(fd)
+        self._track(path)
+        return path
+
+    def stage_upload(self, session_id, upload_key, data, suffix=""):
+        """
+        Write an upload into the session's scratch once and reuse it on reruns.
+
+        Args:
+            session_id: Owning session
+            upload_key: Identity of the upload, e.g. (name, size, file_id)
+            data: Bytes of the upload
+            suffix: File suffix, such as ".mp4"
+
+        Returns:
+            Path of the staged input. A different upload replaces the previous one.
+
+        Raises:
+            AdmissionError: If there is no room for the upload.
+        """
+        with self._lock:
+            staged = self._staged.get(session_id)
+        if staged is not None:
+            staged_key, staged_path = staged
+            if staged_key == upload_key and os.path.exists(staged_path):
+                return staged_path
+            self.remove_file(staged_path)
+
+        reservation_id = self.admit(session_id, len(data))
+        try:
+            path = self.create_file(session_id, suffix=suffix)
+            with open(path, "wb") as file:
+                file.write(data)
+            self._track(path)
+        finally:
+            self.release(reservation_id)
+
+        with self._lock:
+            self._staged[session_id] = (upload_key, path)
+        return path
+
+    def remove_file(self, path):
+        if not path:
+            return
+        if os.path.exists(path):
+            os.unlink(path)
+        self._track(path)
+
+    def release_session(self, session_id):
+        """Delete everything the session owns"""
+        self._remove_session(self.root / session_id)
+
+    def usage_bytes(self):
+        return self._usage_bytes
+
+    def disk_free_bytes(self):
+        return shutil.disk_usage(self.root).free
+
+    def admit(self, session_id, expected_bytes):
+        """
+        Reserve space for a job before it starts.
+
+        Args:
+            session_id: Session that will own the job's files
+            expected_bytes: Scratch space the job is expected to need
+
+        Returns:
+            A reservation id to pass to release() when the job finishes.
+
+        Raises:
+            AdmissionError: If the job would exceed the quota or the free-disk reserve.
+        """
+        with self._lock:
+            reserved = sum(self._reserved.values())
+            usage = self.usage_bytes()
+            free = self.disk_free_bytes()
+
+            if usage + reserved + expected_bytes > self.quota_bytes:
+                self._rejected_jobs_total += 1
+                raise AdmissionError(
+                    f"Scratch quota exceeded: {(usage + reserved) / 1024**2:.0f} MB in use, "
+                    f"job needs {expected_bytes / 1024**2:.0f} MB, quota is {self.quota_bytes / 1024**2:.0f} MB"
+                )
+            if free - reserved - expected_bytes < self.min_free_bytes:
+                self._rejected_jobs_total += 1
+                raise AdmissionError(
+                    f"Not enough free disk space: {free / 1024**2:.0f} MB free, "
+                    f"job needs {expected_bytes / 1024**2:.0f} MB"
+                )
+
+            reservation_id = f"{session_id}:{time.monotonic_ns()}"
+            self._reserved[reservation_id] = expected_bytes
+        self.session_dir(session_id)
+        return reservation_id
+
+    def release(self, reservation_id):
+        """Drop a reservation once the job's files exist (or it failed) and account for them"""
+        session_dir = str(self.root / reservation_id.split(":", 1)[0])
+        with self._lock:
+            self._reserved.pop(reservation_id, None)
+            paths = [path for path in self._file_sizes if os.path.dirname(path) == session_dir]
+        for path in paths:
+            self._track(path)
+
+    def reap(self):
+        """
+        Delete session directories idle for longer than the TTL.
+
+        Returns:
+            Bytes reclaimed by this pass.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            active = {reservation.split(":", 1)[0] for reservation in self._reserved}
+
+        reclaimed = 0
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name in active:
+                continue
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            reclaimed += self._remove_session(path)
+            with self._lock:
+                self._reaped_sessions_total += 1
+        return reclaimed
+
+    def _remove_session(self, path):
+        size = _tree_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        prefix = str(path) + os.sep
+        with self._lock:
+            self._reclaimed_bytes_total += size
+            self._staged.pop(path.name, None)
+            for file_path in [p for p in self._file_sizes if p.startswith(prefix)]:
+                self._usage_bytes -= self._file_sizes.pop(file_path)
+        return size
+
+    def start_reaper(self):
+        """Run reap() periodically on a daemon thread"""
+        if self._reaper is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.reap()
+                except OSError:
+                    pass
+                time.sleep(self.reap_interval)
+
+        self._reaper = threading.Thread(target=loop, name="scratch-reaper", daemon=True)
+        self._reaper.start()
+
+    def metrics(self):
+        """Snapshot of disk usage and reaper counters"""
+        with self._lock:
+            reserved = sum(self._reserved.values())
+            reclaimed = self._reclaimed_bytes_total
+            reaped = self._reaped_sessions_total
+            rejected = self._rejected_jobs_total
+        return {
+            "usage_bytes": self.usage_bytes(),
+            "reserved_bytes": reserved,
+            "quota_bytes": self.quota_bytes,
+            "disk_free_bytes": self.disk_free_bytes(),
+            "active_sessions": sum(1 for path in self.root.iterdir() if path.is_dir()),
+            "reclaimed_bytes_total": reclaimed,
+            "reaped_sessions_total": reaped,
+            "rejected_jobs_total": rejected,
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_scratch_manager():
+    """Return the process-wide scratch manager, starting its reaper on first use"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ScratchManager(
+                root=os.environ.get("SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "streamlit_scratch")),
+                quota_bytes=int(os.environ.get("SCRATCH_QUOTA_MB", 10000)) * 1024 * 1024,
+                min_free_bytes=int(os.environ.get("SCRATCH_MIN_FREE_MB", 1000)) * 1024 * 1024,
+                ttl_seconds=int(os.environ.get("SCRATCH_TTL_MINUTES", 60)) * 60,
+            )
+            _manager.start_reaper()
+        return _manager
@@ -0,0 +1,132 @@
+"""
+Process-wide resources shared by all pages of the app.
+
+When the pages are hosted together by ``app_launcher.py`` they run in one
+Streamlit process, so FFmpeg concurrency, loaded Whisper models, the scratch
+disk and the download server are created once here and shared by every page
+and every browser session. Running a page on its own uses the same objects,
+just without anyone to share them with.
+
+Configuration (environment variables):
+    FFMPEG_WORKERS: Maximum concurrent FFmpeg processes (default: CPU count // 2, at least 1)
+    FFPROBE_WORKERS: Maximum concurrent ffprobe processes, on their own lane (default: 4)
+    WHISPER_WORKERS: Maximum concurrent Whisper transcriptions (default: 1)
+    WHISPER_MAX_MODELS: Whisper models kept in memory at once (default: 1)
+    WHISPER_INT8: Default the transcription page to int8 quantized models (default: 0)
+"""
+
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from file_server import get_file_server
+from scratch_manager import get_scratch_manager
+
+FFMPEG_WORKERS = int(os.environ.get("FFMPEG_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+FFPROBE_WORKERS = int(os.environ.get("FFPROBE_WORKERS", 4))
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", 1))
+WHISPER_MAX_MODELS = int(os.environ.get("WHISPER_MAX_MODELS", 1))
+WHISPER_INT8 = os.environ.get("WHISPER_INT8", "0") == "1"
+
+# Set by app_launcher.py when the pages run inside its navigation
+_hosted = False
+
+
+def mark_hosted():
+    """Called by the launcher: pages must not set their own page config"""
+    global _hosted
+    _hosted = True
+
+
+def configure_page(**kwargs):
+    """st.set_page_config for a standalone page; a no-op when hosted by the launcher"""
+    if not _hosted:
+        import streamlit as st
+        st.set_page_config(**kwargs)
+
+
+# FFmpeg worker pools. Probes get their own lane so a page's pre-flight
+# never waits behind another session's long conversion.
+_ffmpeg_pool = ThreadPoolExecutor(max_workers=FFMPEG_WORKERS, thread_name_prefix="ffmpeg")
+_ffprobe_pool = ThreadPoolExecutor(max_workers=FFPROBE_WORKERS, thread_name_prefix="ffprobe")
+
+
+def run_ffmpeg(cmd, **kwargs):
+    """
+    Run an FFmpeg command on the shared worker pool.
+
+    Takes the same arguments as subprocess.run and blocks until the command
+    finishes, so at most FFMPEG_WORKERS processes run at once across all pages.
+    """
+    return _ffmpeg_pool.submit(subprocess.run, cmd, **kwargs).result()
+
+
+def run_ffprobe(cmd, **kwargs):
+    """Run an ffprobe command on the probe lane; same arguments as run_ffmpeg"""
+    return _ffprobe_pool.submit(subprocess.run, cmd, **kwargs).result()
+
+
+# Whisper model cache
+_models = OrderedDict()
+_models_lock = threading.Lock()
+_model_load_locks = {}
+_whisper_slots = threading.BoundedSemaphore(WHISPER_WORKERS)
+
+
+def get_whisper_model(model_name, int8=False):
+    """
+    Return a loaded Whisper model, loading it on first use.
+
+    Keeps at most WHISPER_MAX_MODELS models; the least recently used one is
+    dropped when another size is requested. With int8 the linear layers are
+    dynamically quantized for CPU inference (see whisper_quant.py).
+    """
+    key = f"{model_name}-int8" if int8 else model_name
+    with _models_lock:
+        if key in _models:
+            _models.move_to_end(key)
+            return _models[key]
+        load_lock = _model_load_locks.setdefault(key, threading.Lock())
+
+    # A cold load can take minutes; only callers waiting for this model block on it
+    with load_lock:
+        with _models_lock:
+            if key in _models:
+                _models.move_to_end(key)
+                return _models[key]
+
+        from whisper_quant import load_model
+        model = load_model(model_name, int8=int8)
+        with _models_lock:
+            _models[key] = model
+            while len(_models) > WHISPER_MAX_MODELS:
+                _models.popitem(last=False)
+        return model
+
+
+def loaded_whisper_models():
+    with _models_lock:
+        return list(_models)
+
+
+@contextmanager
+def whisper_slot():
+    """Limit concurrent transcriptions to WHISPER_WORKERS across all sessions"""
+    with _whisper_slots:
+        yield
+
+
+def resource_status():
+    """Summary of the shared resources for display"""
+    return {
+        "ffmpeg_workers": FFMPEG_WORKERS,
+        "ffprobe_workers": FFPROBE_WORKERS,
+        "whisper_workers": WHISPER_WORKERS,
+        "whisper_models": loaded_whisper_models(),
+        "whisper_max_models": WHISPER_MAX_MODELS,
+        "scratch": get_scratch_manager().metrics(),
+        "file_server_url": get_file_server().base_url,
+    }
@@ -0,0 +1,131 @@
+"""
+Lazy-import warm-up and startup profiling for the Streamlit pages.
+
+Heavy dependencies (whisper pulls in torch) are no longer imported when a page
+script starts. ``start_warmup`` imports them on a background thread once the
+first render is done, so the sidebar appears immediately and the model code is
+usually ready by the time the user clicks. ``profile_imports`` gives an
+``-X importtime`` breakdown of a module in a fresh interpreter, and
+``record_script_run`` keeps the cold-start and per-rerun script times.
+
+Configuration (environment variables):
+    WARMUP_IMPORTS: Comma-separated modules to import in the background after
+        the first render (default: whisper; set to empty to disable)
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+WARMUP_IMPORTS = [name.strip() for name in os.environ.get("WARMUP_IMPORTS", "whisper").split(",") if name.strip()]
+
+# Number of recent reruns kept per page
+RERUN_HISTORY = 50
+
+_warmup_lock = threading.Lock()
+_warmup_threads = {}
+_warmup_results = {}
+
+_runs_lock = threading.Lock()
+_script_runs = {}
+
+
+def record_script_run(page, seconds):
+    """Store one execution time of a page script; the first one per process is its cold start"""
+    with _runs_lock:
+        if page not in _script_runs:
+            _script_runs[page] = {"cold_start_seconds": seconds, "reruns": []}
+            return
+        reruns = _script_runs[page]["reruns"]
+        reruns.append(seconds)
+        del reruns[:-RERUN_HISTORY]
+
+
+def script_run_stats(page):
+    """
+    Cold-start and rerun timings for a page.
+
+    Returns:
+        Dict with cold_start_seconds, last_rerun_seconds and
+        median_rerun_seconds (None until the page has run), plus rerun_count.
+    """
+    with _runs_lock:
+        runs = _script_runs.get(page)
+        reruns = sorted(runs["reruns"]) if runs else []
+        return {
+            "cold_start_seconds": runs["cold_start_seconds"] if runs else None,
+            "last_rerun_seconds": runs["reruns"][-1] if reruns else None,
+            "median_rerun_seconds": reruns[len(reruns) // 2] if reruns else None,
+            "rerun_count": len(reruns),
+        }
+
+
+def start_warmup(module_names=None):
+    """Import the given modules on a daemon thread; only the first call per module does work"""
+    if module_names is None:
+        module_names = WARMUP_IMPORTS
+    with _warmup_lock:
+        pending = [name for name in module_names if name not in _warmup_threads]
+        for name in pending:
+            thread = threading.Thread(target=_warm, args=(name,), name=f"warmup-{name}", daemon=True)
+            _warmup_threads[name] = thread
+            thread.start()
+
+
+def _warm(module_name):
+    start = time.perf_counter()
+    try:
+        importlib.import_module(module_name)
+        result = {"seconds": time.perf_counter() - start, "error": None}
+    except Exception as e:
+        result = {"seconds": time.perf_counter() - start, "error": str(e)}
+    with _warmup_lock:
+        _warmup_results[module_name] = result
+
+
+def warmup_status():
+    """Map of module name to {"seconds", "error"} for finished warm-ups, or None while running"""
+    with _warmup_lock:
+        return {name: _warmup_results.get(name) for name in _warmup_threads}
+
+
+def profile_imports(module_name, top=15):
+    """
+    Import a module in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        Dict with total_seconds and the slowest entries as a list of
+        {"module", "self_ms", "cumulative_ms"} sorted by cumulative time.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            entries.append({
+                # One space follows the separator; deeper nesting adds two per level
+                "module": name[1:].rstrip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+
+    top_level = [entry for entry in entries if not entry["module"].startswith(" ")]
+    total_ms = sum(entry["cumulative_ms"] for entry in top_level)
+    for entry in entries:
+        entry["module"] = entry["module"].strip()
+    entries.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return {"total_seconds": total_ms / 1000, "entries": entries[:top]}
@@ -1,13 +1,19 @@
+import time
+_script_start = time.perf_counter()
+
+# whisper (and torch behind it) and pyperclip are imported where they are
+# used; the sidebar renders first and whisper is warmed up in the background
 import streamlit as st
-import whisper
-import tempfile
-import os
-import pyperclip
 from datetime import datetime
-import io
+from pcm_pipeline import transcribe_media, measure_two_step_overhead
+from shared_resources import WHISPER_INT8, configure_page, get_whisper_model, whisper_slot
+from transcript_index import format_timestamp, get_transcript_index
+from startup_profile import (
+    profile_imports, record_script_run, script_run_stats, start_warmup, warmup_status
+)
 
 # Page configuration
-st.set_page_config(
+configure_page(
     page_title="Audio Transcription with Whisper",
     page_icon="🎤",
     layout="wide",
@@ -76,6 +82,13 @@ with st.sidebar:
         format_func=lambda x: f"{x.title()} - {model_options[x]}"
     )
     
+    use_int8 = st.checkbox(
+        "Int8 quantized model (CPU)",
+        value=WHISPER_INT8,
+        help="Quantize the model's linear layers to int8: faster and smaller on CPU-only hosts, "
+             "with a small accuracy cost. Quantized weights are cached on disk after the first load"
+    )
+    
     st.markdown("---")
     
     # Language selection (optional)
@@ -101,11 +114,20 @@ with st.sidebar:
     
     st.markdown("---")
     
+    compare_two_step = st.checkbox(
+        "Report time saved",
+        value=False,
+        help="Also time the old extract-to-MP3 and re-decode path to show the latency saved (adds work)"
+    )
+    
+    st.markdown("---")
+    
     # Supported formats info
     st.info("""
     **Supported Formats:**
-    - MP3, MP4, WAV, M4A, FLAC
-    - OGG, WEBM, AVI, MOV
+    - MP3, MP4, WAV, M4A, FLAC, AAC
+    - OGG, WEBM, AVI, MOV, MKV
+    - FLV, WMV, 3GP (audio decoded directly)
     - Maximum file size: 1GB (configurable)
     """)
 
@@ -118,7 +140,7 @@ with col1:
     # File uploader
     uploaded_file = st.file_uploader(
         "Choose an audio file",
-        type=['mp3', 'mp4', 'wav', 'm4a', 'flac', 'ogg', 'webm', 'avi', 'mov'],
+        type=['mp3', 'mp4', 'wav', 'm4a', 'flac', 'aac', 'ogg', 'webm', 'avi', 'mov', 'mkv', 'flv', 'wmv', '3gp'],
         help="Upload an audio or video file to transcribe"
     )
     
@@ -131,32 +153,37 @@ with col1:
         if st.button("🎯 Start Transcription", type="primary", use_container_width=True):
             with st.spinner("🔄 Loading Whisper model and transcribing..."):
                 try:
-                    # Load the selected model
-                    @st.cache_resource
-                    def load_whisper_model(model_name):
-                        return whisper.load_model(model_name)
-                    
-                    model = load_whisper_model(selected_model)
-                    
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_file_path = tmp_file.name
+                    model = get_whisper_model(selected_model, int8=use_int8)
                     
-                    # Transcribe
+                    # Decode straight to PCM and transcribe, no intermediate audio files
+                    file_extension = uploaded_file.name.split('.')[-1]
                     language = None if selected_language == "auto" else selected_language
-                    result = model.transcribe(tmp_file_path, language=language, verbose=False)
+                    with whisper_slot():
+                        result, timings = transcribe_media(
+                            model, uploaded_file.getvalue(), file_extension, language=language
+                        )
                     
-                    # Clean up temporary file
-                    os.unlink(tmp_file_path)
+                    if compare_two_step:
+                        legacy_seconds = measure_two_step_overhead(uploaded_file.getvalue(), file_extension)
+                        timings["time_saved_seconds"] = legacy_seconds - timings["decode_seconds"]
                     
                     # Store results in session state
                     st.session_state.transcription_result = result
                     st.session_state.transcription_text = result["text"]
                     st.session_state.transcription_segments = result.get("segments", [])
                     st.session_state.transcription_language = result.get("language", "unknown")
+                    st.session_state.transcription_timings = timings
+                    st.session_state.transcription_source_name = uploaded_file.name
                     
                     st.success("✅ Transcription completed successfully!")
+
+                    # Make the segments searchable alongside the other transcripts
+                    try:
+                        get_transcript_index().add_segments(
+                            f"streamlit_app/{uploaded_file.name}", uploaded_file.name, result.get("segments", [])
+                        )
+                    except Exception as e:
+                        st.warning(f"⚠️ Transcript was not added to the search index: {str(e)}")
                     
                 except Exception as e:
                     st.error(f"❌ Error during transcription: {str(e)}")
@@ -173,6 +200,20 @@ with col2:
             detected_lang = st.session_state.transcription_language
             st.info(f"🌍 Detected language: {detected_lang.upper()}")
         
+        # Pipeline timings
+        if 'transcription_timings' in st.session_state:
+            timings = st.session_state.transcription_timings
+            timing_cols = st.columns(3)
+            timing_cols[0].metric("Decode", f"{timings['decode_seconds']:.2f}s")
+            timing_cols[1].metric("Transcribe", f"{timings['transcribe_seconds']:.2f}s")
+            if 'time_saved_seconds' in timings:
+                timing_cols[2].metric("Saved vs. MP3 Path", f"{timings['time_saved_seconds']:.2f}s")
+            else:
+                timing_cols[2].metric("Audio Length", f"{timings['audio_seconds']:.1f}s")
+            if 'detect_seconds' in timings:
+                source = "cached result" if timings['language_cached'] else "first 30s of audio"
+                st.caption(f"Language detection: {timings['detect_seconds']:.2f}s ({source})")
+        
         # Transcription text
         transcription_text = st.session_state.transcription_text
         
@@ -182,6 +223,7 @@ with col2:
         with col_copy1:
             if st.button("📋 Copy Text", use_container_width=True):
                 try:
+                    import pyperclip
                     pyperclip.copy(transcription_text)
                     st.success("✅ Text copied to clipboard!")
                 except Exception as e:
@@ -190,11 +232,12 @@ with col2:
         with col_copy2:
             if st.button("📋 Copy Markdown", use_container_width=True):
                 try:
+                    import pyperclip
                     # Format as markdown with timestamp
                     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     markdown_text = f"""# Audio Transcription
 
-**File:** {uploaded_file.name}  
+**File:** {st.session_state.transcription_source_name}  
 **Date:** {timestamp}  
 **Model:** {selected_model.title()}  
 **Language:** {st.session_state.transcription_language.upper()}
@@ -242,3 +285,50 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Transcript search
+with st.sidebar:
+    with st.expander("🔎 Search Transcripts"):
+        search_query = st.text_input("Phrase to find:", key="transcript_search_query")
+        if search_query:
+            try:
+                hits = get_transcript_index().search(search_query, limit=20)
+            except Exception as e:
+                hits = []
+                st.error(f"❌ Search failed: {str(e)}")
+            if not hits:
+                st.caption("No matching segments.")
+            for hit in hits:
+                st.markdown(f"**{hit['media_file']}** `{format_timestamp(hit['start'])}`")
+                st.caption(hit["snippet"])
+
+# Startup profile: this run's script time, then warm heavy imports now that the page is painted
+record_script_run("streamlit_app", time.perf_counter() - _script_start)
+start_warmup()
+
+with st.sidebar:
+    with st.expander("⏱️ Startup Profile"):
+        stats = script_run_stats("streamlit_app")
+        profile_cols = st.columns(2)
+        profile_cols[0].metric("Cold Start", f"{stats['cold_start_seconds']:.2f}s")
+        profile_cols[1].metric(
+            "Median Rerun",
+            f"{stats['median_rerun_seconds'] * 1000:.0f} ms" if stats["median_rerun_seconds"] is not None else "—",
+            help=f"{stats['rerun_count']} reruns recorded"
+        )
+        
+        for module_name, warmup in warmup_status().items():
+            if warmup is None:
+                st.caption(f"🔄 Importing `{module_name}` in the background...")
+            elif warmup["error"]:
+                st.caption(f"⚠️ Background import of `{module_name}` failed: {warmup['error']}")
+            else:
+                st.caption(f"✅ `{module_name}` imported in the background in {warmup['seconds']:.2f}s")
+        
+        if st.button("Profile Whisper Import", use_container_width=True):
+            try:
+                with st.spinner("Importing whisper in a fresh interpreter..."):
+                    profile = profile_imports("whisper")
+                st.write(f"**Cold import:** {profile['total_seconds']:.2f}s")
+                st.dataframe(profile["entries"], hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"❌ Import profile failed: {str(e)}")
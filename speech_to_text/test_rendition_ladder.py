@@ -0,0 +1,58 @@
+import pytest
+
+import rendition_ladder
+
+
+def _ladder(labels, formats):
+    renditions, _ = rendition_ladder.ladder_renditions(1080, labels, formats)
+    for i, rendition in enumerate(renditions):
+        rendition["path"] = f"out{i}.{rendition['format']}"
+    return renditions
+
+
+def _filter_graph(cmd):
+    return cmd[cmd.index("-filter_complex") + 1].split(";")
+
+
+def _maps(cmd):
+    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"]
+
+
+def test_single_format_scales_each_height_once():
+    renditions = _ladder(["360p", "1080p", "720p"], ["mp4"])
+    cmd = rendition_ladder.build_ladder_command("in.mp4", renditions, "medium")
+
+    assert _filter_graph(cmd) == [
+        "[0:v:0]split=3[s0][s1][s2]",
+        "[s0]scale=-2:1080,split=1[v0]",
+        "[s1]scale=-2:720,split=1[v1]",
+        "[s2]scale=-2:360,split=1[v2]",
+    ]
+    assert _maps(cmd) == ["[v0]", "0:a?", "[v1]", "0:a?", "[v2]", "0:a?"]
+
+
+def test_formats_share_the_scaled_branch():
+    renditions = _ladder(["720p", "480p"], ["mp4", "webm"])
+    cmd = rendition_ladder.build_ladder_command("in.mp4", renditions, "medium", remove_audio=True)
+
+    graph = _filter_graph(cmd)
+    assert graph == [
+        "[0:v:0]split=2[s0][s1]",
+        "[s0]scale=-2:720,split=2[v0][v1]",
+        "[s1]scale=-2:480,split=2[v2][v3]",
+    ]
+    assert sum(part.count("scale=") for part in graph) == 2
+    assert _maps(cmd) == ["[v0]", "[v1]", "[v2]", "[v3]"]
+    assert cmd.count("-an") == 4
+
+
+@pytest.mark.parametrize("index", range(4))
+def test_each_pad_is_encoded_to_its_rendition(index):
+    renditions = _ladder(["720p", "480p"], ["mp4", "webm"])
+    cmd = rendition_ladder.build_ladder_command("in.mp4", renditions, "medium")
+
+    start = cmd.index(f"[v{index}]")
+    end = cmd.index(renditions[index]["path"])
+    output_args = cmd[start:end]
+    assert [arg for arg in output_args if arg.startswith("[v")] == [f"[v{index}]"]
+    assert rendition_ladder.CODEC_ARGS[renditions[index]["format"]][1] in output_args
@@ -1,7 +1,11 @@
-import whisper
+import argparse
 import os
 from pathlib import Path
 from datetime import timedelta
+from whisper_quant import load_model
+from transcription_metrics import TranscriptionProfiler, append_jsonl, print_summary, write_prometheus
+from language_cache import get_language_cache, group_by_language
+from transcript_index import get_transcript_index
 
 def format_timestamp(seconds):
     """Format seconds to [HH:MM:SS.mmm] format"""
@@ -18,11 +22,44 @@ def get_numeric_part(filename):
     # Remove .ogg extension and convert to int
     return int(filename.replace('.ogg', ''))
 
+def format_file_block(filename, segments=None, error=None):
+    """Format one file's section of the combined transcript"""
+    if error is not None:
+        return f"\n{'='*80}\nFile: {filename} - ERROR: {error}\n{'='*80}\n\n"
+    
+    lines = [f"\n{'='*80}\n", f"File: {filename}\n", f"{'='*80}\n\n"]
+    
+    # Add each segment with timestamps
+    for segment in segments:
+        start_time = segment.get("start", 0)
+        end_time = segment.get("end", 0)
+        text = segment.get("text", "").strip()
+        
+        # Format timestamps
+        start_formatted = format_timestamp(start_time)
+        end_formatted = format_timestamp(end_time)
+        
+        lines.append(f"[{start_formatted} --> {end_formatted}] {text}\n")
+    return "".join(lines)
+
 def main():
-    # Load Whisper model (medium complexity)
-    print("Loading Whisper model 'medium'...")
-    model = whisper.load_model("medium")
+    parser = argparse.ArgumentParser(description="Transcribe the audi_tg/*.ogg files in numeric order")
+    parser.add_argument("--model", default="medium", help="Whisper model size (default: medium)")
+    parser.add_argument("--int8", action="store_true",
+                        help="Use a dynamically int8-quantized model for faster CPU inference")
+    parser.add_argument("--metrics", default="transcription_metrics.jsonl",
+                        help="Append per-file stage timings to this JSONL file")
+    parser.add_argument("--prometheus", default=None,
+                        help="Also write run totals to this Prometheus text file")
+    parser.add_argument("--language", default=None,
+                        help="Language of all files (e.g. pt); skips detection")
+    args = parser.parse_args()
+    
+    # Load Whisper model (medium complexity by default)
+    print(f"Loading Whisper model '{args.model}'{' (int8)' if args.int8 else ''}...")
+    model = load_model(args.model, int8=args.int8)
     print("Model loaded successfully.\n")
+    profiler = TranscriptionProfiler(model)
     
     # Get all .ogg files from audi_tg directory
     audi_tg_dir = Path("audi_tg")
@@ -43,45 +80,63 @@ def main():
         print(f"  - {f.name}")
     print()
     
-    # Store all transcriptions
-    all_transcriptions = []
+    # Detect each file's language once (cached by content hash) so batches run with a fixed language
+    detections = {}
+    if args.language:
+        detections = {f: {"language": args.language, "seconds": 0.0, "cached": True} for f in ogg_files}
+    else:
+        print("Detecting languages...")
+        language_cache = get_language_cache()
+        for audio_file in ogg_files:
+            try:
+                detection = language_cache.detect_file(model, audio_file)
+                detections[audio_file] = detection
+                print(f"  - {audio_file.name}: {detection['language']} ({detection['probability']:.0%}) "
+                      f"in {detection['seconds']:.2f}s{' (cached)' if detection['cached'] else ''}")
+            except Exception as e:
+                # Leave it to Whisper's own detection during transcription
+                detections[audio_file] = None
+                print(f"  - {audio_file.name}: detection failed ({str(e)})")
+        detected = [d for d in detections.values() if d]
+        print(f"Language detection: {sum(d['seconds'] for d in detected):.2f}s for {len(ogg_files)} files, "
+              f"{sum(d['cached'] for d in detected)} from cache\n")
     
-    # Transcribe each file
-    for idx, audio_file in enumerate(ogg_files, 1):
-        print(f"[{idx}/{len(ogg_files)}] Transcribing {audio_file.name}...")
-        
-        try:
-            # Transcribe with verbose output
-            result = model.transcribe(str(audio_file), verbose=True)
-            
-            # Extract segments with timestamps
-            segments = result.get("segments", [])
-            
-            # Add file header
-            all_transcriptions.append(f"\n{'='*80}\n")
-            all_transcriptions.append(f"File: {audio_file.name}\n")
-            all_transcriptions.append(f"{'='*80}\n\n")
+    groups = group_by_language(
+        (audio_file, detections[audio_file]["language"] if detections[audio_file] else None)
+        for audio_file in ogg_files
+    )
+    
+    # Store all transcriptions by file and their stage timings
+    blocks = {}
+    metrics = []
+    
+    # Transcribe each language group with its language fixed
+    idx = 0
+    for language, group_files in groups:
+        print(f"--- {len(group_files)} files in language: {language or 'auto-detect'} ---")
+        for audio_file in group_files:
+            idx += 1
+            print(f"[{idx}/{len(ogg_files)}] Transcribing {audio_file.name}...")
             
-            # Add each segment with timestamps
-            for segment in segments:
-                start_time = segment.get("start", 0)
-                end_time = segment.get("end", 0)
-                text = segment.get("text", "").strip()
+            try:
+                # Transcribe with verbose output, timing each stage
+                result, record = profiler.transcribe(audio_file, verbose=True, language=language)
+                record["language_detection"] = detections[audio_file]
+                metrics.append(record)
+                append_jsonl(args.metrics, record)
                 
-                # Format timestamps
-                start_formatted = format_timestamp(start_time)
-                end_formatted = format_timestamp(end_time)
+                # Add file header and each segment with timestamps
+                blocks[audio_file] = format_file_block(audio_file.name, result.get("segments", []))
                 
-                # Add to transcription
-                all_transcriptions.append(f"[{start_formatted} --> {end_formatted}] {text}\n")
-            
-            print(f"✓ Completed {audio_file.name}\n")
-            
-        except Exception as e:
-            print(f"✗ Error transcribing {audio_file.name}: {str(e)}\n")
-            all_transcriptions.append(f"\n{'='*80}\n")
-            all_transcriptions.append(f"File: {audio_file.name} - ERROR: {str(e)}\n")
-            all_transcriptions.append(f"{'='*80}\n\n")
+                print(f"✓ Completed {audio_file.name} (real-time factor {record['real_time_factor'] or 0:.2f}, "
+                      f"{record['fallback_decodes']} fallback decodes)\n")
+                
+            except Exception as e:
+                print(f"✗ Error transcribing {audio_file.name}: {str(e)}\n")
+                blocks[audio_file] = format_file_block(audio_file.name, error=str(e))
+    
+    # The combined transcript stays in numeric file order
+    all_transcriptions = [blocks[audio_file] for audio_file in ogg_files]
     
     # Combine all transcriptions
     output_text = "".join(all_transcriptions)
@@ -91,10 +146,23 @@ def main():
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(output_text)
     
+    # Keep the search index current without a separate "transcript_index.py add" run
+    try:
+        indexed = get_transcript_index().add_file(output_file, media_dir=audi_tg_dir)
+        print(f"Search index updated: {indexed} segments")
+    except Exception as e:
+        print(f"Warning: transcript was not added to the search index: {str(e)}")
+    
     print(f"\n{'='*80}")
     print(f"Transcription complete!")
     print(f"Output saved to: {output_file}")
+    print(f"Metrics appended to: {args.metrics}")
     print(f"{'='*80}")
+    
+    print_summary(metrics)
+    if args.prometheus:
+        write_prometheus(args.prometheus, metrics)
+        print(f"\nPrometheus metrics written to: {args.prometheus}")
 
 if __name__ == "__main__":
     main()
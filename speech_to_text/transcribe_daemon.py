@@ -0,0 +1,373 @@
+"""
+Watch-folder transcription daemon for audi_tg/.
+
+Loads the Whisper model once and keeps it warm, then waits for new audio files
+in the watched directory and appends their transcripts to the combined
+transcript file in the same format as transcribe_audi_tg.py. Files already
+transcribed (by their "File:" header) are never transcribed again, so the
+daemon can be stopped and restarted at any time. Each section is written at
+its numeric position in the transcript rather than appended, so a file that
+settles late still lands in order. A file whose section is an ERROR block is
+retried, up to --max-attempts times; each attempt replaces that block.
+
+The directory is watched with inotify on Linux and polled elsewhere. A file is
+only picked up once its writer is done with it: on a close-after-write or
+move-into-directory event, or, for files seen being created or modified, once
+its size and modification time have been stable for --settle seconds.
+
+Usage:
+    python transcribe_daemon.py --model medium
+    python transcribe_daemon.py --watch-dir audi_tg --output audi_tg_transcription.txt --poll
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import signal
+import struct
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from whisper_quant import load_model
+from transcribe_audi_tg import format_file_block
+from transcription_metrics import TranscriptionProfiler, append_jsonl
+from language_cache import get_language_cache
+from transcript_index import get_transcript_index
+
+_FILE_HEADER = re.compile(r"^File: (.+?)(?P<error> - ERROR: .*?(?: \(attempt (?P<attempt>\d+)\))?)?$", re.MULTILINE)
+_BLOCK_START = re.compile(r"\n={80}\nFile: ")
+
+# inotify(7) event flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def numeric_order(path):
+    """Sort key: numeric file names in numeric order, anything else after them by name"""
+    stem = Path(path).stem
+    return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+
+def transcribed_files(output_path):
+    """
+    Read the File: headers of the combined transcript.
+
+    Returns:
+        Tuple of (done, failures): names with a transcript section, and a
+        Counter of failed attempts per name for files not transcribed yet.
+    """
+    done, failures = set(), Counter()
+    try:
+        text = Path(output_path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return done, failures
+    for match in _FILE_HEADER.finditer(text):
+        name = match.group(1).strip()
+        if match.group("error"):
+            failures[name] = max(failures[name] + 1, int(match.group("attempt") or 0))
+        else:
+            done.add(name)
+    for name in done:
+        failures.pop(name, None)
+    return done, failures
+
+
+def write_file_block(output_path, name, block):
+    """
+    Put a file's section into the combined transcript at its numeric position.
+
+    Any earlier section for the same name (an ERROR block being retried) is
+    replaced. A section that belongs at the end is simply appended; otherwise
+    the transcript is rewritten through a temporary file.
+    """
+    output_path = Path(output_path)
+    try:
+        text = output_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        text = ""
+
+    starts = [match.start() for match in _BLOCK_START.finditer(text)]
+    preamble = text[:starts[0]] if starts else text
+    sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    names = [_FILE_HEADER.search(section).group(1).strip() for section in sections]
+
+    key = numeric_order(name)
+    position = next((i for i, other in enumerate(names) if numeric_order(other) > key), len(names))
+    if name not in names and position == len(names):
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        return
+
+    kept = [(other, section) for other, section in zip(names, sections) if other != name]
+    position = next((i for i, (other, _) in enumerate(kept) if numeric_order(other) > key), len(kept))
+    kept.insert(position, (name, block))
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(preamble + "".join(section for _, section in kept))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_path)
+
+
+class InotifyWatcher:
+    """Directory watcher on top of Linux inotify via libc"""
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """
+        Block up to timeout seconds for events.
+
+        Returns:
+            Tuple of (finished, changed) file name sets: finished files were
+            closed after writing or moved in; changed ones are still being written.
+        """
+        finished, changed = set(), set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return finished, changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return finished, changed
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0").decode(errors="replace")
+            offset += name_length
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                finished.add(name)
+            else:
+                changed.add(name)
+        return finished, changed - finished
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that rescans the directory listing"""
+
+    def __init__(self, directory, interval=2.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._seen = {}
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        changed = set()
+        current = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                if self._seen.get(entry.name) != current[entry.name]:
+                    changed.add(entry.name)
+        self._seen = current
+        return set(), changed
+
+    def close(self):
+        pass
+
+
+class TranscriptionDaemon:
+    """Keeps a model warm and transcribes files as they arrive"""
+
+    def __init__(self, model, watch_dir, output_path, pattern="*.ogg", settle_seconds=2.0,
+                 metrics_path=None, use_inotify=True, language=None, max_attempts=3):
+        self.profiler = TranscriptionProfiler(model)
+        self.watch_dir = Path(watch_dir)
+        self.output_path = Path(output_path)
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.metrics_path = metrics_path
+        self.language = language
+        self.max_attempts = max_attempts
+        self.done, self.failures = transcribed_files(self.output_path)
+        # name -> (size, mtime_ns, monotonic time that signature was first seen)
+        self.pending = {}
+        self.ready = set()
+        self.stopping = False
+
+        self.watcher = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self.watcher = InotifyWatcher(self.watch_dir)
+            except OSError as e:
+                print(f"inotify unavailable ({e}); falling back to polling")
+        if self.watcher is None:
+            self.watcher = PollingWatcher(self.watch_dir, interval=min(settle_seconds, 2.0) or 1.0)
+
+    def _wanted(self, name):
+        return (name not in self.done and self.failures[name] < self.max_attempts
+                and Path(name).match(self.pattern))
+
+    def _detect_language(self, audio_path):
+        """Configured language, else the cached detection; None leaves it to Whisper"""
+        if self.language:
+            return {"language": self.language, "seconds": 0.0, "cached": True}
+        try:
+            return get_language_cache().detect_file(self.profiler.model, audio_path)
+        except Exception as e:
+            print(f"  Language detection failed for {audio_path.name} ({str(e)}); using Whisper's own detection")
+            return None
+
+    def _check_settled(self):
+        """Move pending files whose size and mtime stopped changing to ready"""
+        now = time.monotonic()
+        for name, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = (self.watch_dir / name).stat()
+            except FileNotFoundError:
+                del self.pending[name]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != (size, mtime_ns):
+                self.pending[name] = (*signature, now)
+            elif stat.st_size > 0 and now - since >= self.settle_seconds:
+                del self.pending[name]
+                self.ready.add(name)
+
+    def _track(self, names):
+        now = time.monotonic()
+        for name in names:
+            if self._wanted(name) and name not in self.ready:
+                self.pending.setdefault(name, (-1, -1, now))
+
+    def _transcribe(self, name):
+        audio_path = self.watch_dir / name
+        print(f"Transcribing {name}...")
+        failed = False
+        try:
+            detection = self._detect_language(audio_path)
+            language = detection["language"] if detection else None
+            result, record = self.profiler.transcribe(audio_path, verbose=False, language=language)
+            record["language_detection"] = detection
+            block = format_file_block(name, result.get("segments", []))
+            if self.metrics_path:
+                append_jsonl(self.metrics_path, record)
+            if detection:
+                language_note = (f"language {detection['language']} detected in {detection['seconds']:.2f}s"
+                                 f"{', cached' if detection['cached'] else ''}")
+            else:
+                language_note = f"language {result.get('language')} detected by Whisper"
+            print(f"✓ Completed {name} in {record['wall_seconds']:.1f}s "
+                  f"(real-time factor {record['real_time_factor'] or 0:.2f}, {language_note})")
+        except Exception as e:
+            failed = True
+            # The attempt count survives restarts even though each retry replaces the block
+            block = format_file_block(name, error=f"{str(e)} (attempt {self.failures[name] + 1})")
+            print(f"✗ Error transcribing {name}: {str(e)}")
+
+        write_file_block(self.output_path, name, block)
+        try:
+            get_transcript_index().add_file(self.output_path, media_dir=self.watch_dir)
+        except Exception as e:
+            print(f"  Transcript of {name} was not added to the search index: {str(e)}")
+        if failed:
+            # Retried when the file is written again or the daemon restarts
+            self.failures[name] += 1
+        else:
+            self.done.add(name)
+            self.failures.pop(name, None)
+
+    def run(self):
+        # Catch up on files that arrived while the daemon was not running
+        backlog = [p.name for p in self.watch_dir.glob(self.pattern) if self._wanted(p.name)]
+        self._track(backlog)
+        print(f"Watching {self.watch_dir} ({type(self.watcher).__name__}), "
+              f"{len(self.done)} files already transcribed, {len(backlog)} waiting")
+
+        try:
+            while not self.stopping:
+                # Wake up regularly so a stop request is noticed quickly
+                timeout = min(self.settle_seconds / 2, 1.0) if self.pending else 1.0
+                finished, changed = self.watcher.wait(timeout)
+                for name in finished:
+                    try:
+                        complete = (self.watch_dir / name).stat().st_size > 0
+                    except FileNotFoundError:
+                        continue
+                    if complete and self._wanted(name):
+                        self.pending.pop(name, None)
+                        self.ready.add(name)
+                    else:
+                        # e.g. created empty by touch; wait for the real content
+                        changed.add(name)
+                self._track(changed)
+                self._check_settled()
+
+                # Everything that is ready goes out in numeric order
+                while self.ready and not self.stopping:
+                    name = min(self.ready, key=numeric_order)
+                    self.ready.discard(name)
+                    self._transcribe(name)
+        finally:
+            self.watcher.close()
+
+    def stop(self, *_):
+        """Finish the file in progress, then exit"""
+        self.stopping = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe new audi_tg files as they arrive")
+    parser.add_argument("--watch-dir", default="audi_tg", help="Directory to watch (default: audi_tg)")
+    parser.add_argument("--output", default="audi_tg_transcription.txt", help="Combined transcript to append to")
+    parser.add_argument("--pattern", default="*.ogg", help="File name pattern to transcribe (default: *.ogg)")
+    parser.add_argument("--model", default="medium", help="Whisper model size (default: medium)")
+    parser.add_argument("--int8", action="store_true", help="Use an int8-quantized model for CPU inference")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds a file must stay unchanged before it is treated as complete")
+    parser.add_argument("--poll", action="store_true", help="Poll the directory instead of using inotify")
+    parser.add_argument("--language", default=None,
+                        help="Language of all files (e.g. pt); skips detection")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Give up on a file after this many ERROR sections (default: 3)")
+    parser.add_argument("--metrics", default="transcription_metrics.jsonl",
+                        help="Append per-file stage timings to this JSONL file")
+    args = parser.parse_args()
+
+    if not Path(args.watch_dir).is_dir():
+        parser.error(f"Directory '{args.watch_dir}' not found")
+
+    print(f"Loading Whisper model '{args.model}'{' (int8)' if args.int8 else ''}...")
+    model = load_model(args.model, int8=args.int8)
+    print("Model loaded successfully.")
+
+    daemon = TranscriptionDaemon(
+        model, args.watch_dir, args.output, pattern=args.pattern, settle_seconds=args.settle,
+        metrics_path=args.metrics, use_inotify=not args.poll, language=args.language,
+        max_attempts=args.max_attempts
+    )
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run()
+    print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
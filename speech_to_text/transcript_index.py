@@ -0,0 +1,339 @@
+"""
+Full-text search over transcripts with timestamp-level hits.
+
+Transcripts are split into segments (media file, start, end, text) and stored
+in SQLite with an FTS5 index over the text. Every hit carries the segment's
+start and end time, so it can jump straight into the source audio.
+
+Supported inputs:
+    - Combined output of transcribe_audi_tg.py: "File: <name>" headers
+      followed by "[HH:MM:SS.mmm --> HH:MM:SS.mmm] text" lines
+    - Whisper result JSON with a "segments" list (media file = JSON file stem)
+    - Plain text transcripts, indexed as a single segment starting at 0
+    - Segments passed directly, e.g. from streamlit_app.py
+
+Indexing is incremental: a transcript file is only re-read when its size or
+modification time changed, and then only its own segments are replaced.
+
+Usage:
+    python transcript_index.py add audi_tg_transcription.txt --media-dir audi_tg
+    python transcript_index.py search "fazer o retrieval"
+    python transcript_index.py search "labeling dados" --any
+
+Configuration (environment variables):
+    TRANSCRIPT_INDEX_PATH: SQLite database file
+        (default: ~/.cache/speech_to_text/transcripts.db)
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "speech_to_text" / "transcripts.db"
+
+TRANSCRIPT_EXTENSIONS = {".txt", ".json"}
+
+_FILE_HEADER = re.compile(r"^File: (.+?)(?: - ERROR: .*)?$")
+_SEGMENT_LINE = re.compile(r"^\[(\d+):(\d{2}):(\d{2}(?:\.\d+)?) --> (\d+):(\d{2}):(\d{2}(?:\.\d+)?)\] ?(.*)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    media_dir TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    media_file TEXT NOT NULL,
+    start REAL NOT NULL,
+    end REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_source ON segments(source_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts(segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def parse_timestamp(hours, minutes, seconds):
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def format_timestamp(seconds):
+    """Format seconds as HH:MM:SS.mmm"""
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def parse_transcript(path):
+    """
+    Read a transcript file into segments.
+
+    Returns:
+        List of (media_file, start, end, text) tuples; end is None when the
+        transcript has no timing.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return [
+            (path.stem, float(seg.get("start", 0)), float(seg.get("end", 0)), seg.get("text", "").strip())
+            for seg in data.get("segments", [])
+            if seg.get("text", "").strip()
+        ]
+
+    text = path.read_text(encoding="utf-8")
+    segments = []
+    media_file = None
+    for line in text.splitlines():
+        header = _FILE_HEADER.match(line)
+        if header:
+            media_file = header.group(1).strip()
+            continue
+        match = _SEGMENT_LINE.match(line)
+        if match and match.group(7).strip():
+            start = parse_timestamp(*match.group(1, 2, 3))
+            end = parse_timestamp(*match.group(4, 5, 6))
+            segments.append((media_file or path.stem, start, end, match.group(7).strip()))
+
+    if not segments and text.strip():
+        # No timestamps at all: a plain-text transcript of a single recording
+        segments.append((path.stem, 0.0, None, " ".join(text.split())))
+    return segments
+
+
+def phrase_query(text):
+    """Quote text as an FTS5 phrase so punctuation and operators are taken literally"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def any_words_query(text):
+    """FTS5 query matching segments that contain any of the words"""
+    return " OR ".join(phrase_query(word) for word in re.findall(r"\w+", text))
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of transcript segments"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _replace_source(self, conn, key, media_dir, size, mtime_ns, segments):
+        row = conn.execute("SELECT id FROM sources WHERE path = ?", (key,)).fetchone()
+        if row:
+            source_id = row[0]
+            conn.execute("DELETE FROM segments WHERE source_id = ?", (source_id,))
+            conn.execute(
+                "UPDATE sources SET media_dir = ?, size = ?, mtime_ns = ?, indexed_at = ? WHERE id = ?",
+                (media_dir, size, mtime_ns, time.time(), source_id)
+            )
+        else:
+            source_id = conn.execute(
+                "INSERT INTO sources (path, media_dir, size, mtime_ns, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, media_dir, size, mtime_ns, time.time())
+            ).lastrowid
+        conn.executemany(
+            "INSERT INTO segments (source_id, media_file, start, end, text) VALUES (?, ?, ?, ?, ?)",
+            [(source_id, *segment) for segment in segments]
+        )
+
+    def add_file(self, path, media_dir=None, force=False):
+        """
+        Index a transcript file if it is new or changed since the last run.
+
+        Args:
+            path: Transcript file
+            media_dir: Directory holding the media files it refers to, used to
+                resolve hits to playable paths; kept from the last run if omitted
+            force: Re-index even when the file looks unchanged
+
+        Returns:
+            Number of segments indexed, or 0 when the file was up to date.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        media_dir = str(Path(media_dir).resolve()) if media_dir else None
+
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT size, mtime_ns, media_dir FROM sources WHERE path = ?", (str(path),)).fetchone()
+            if row and media_dir is None:
+                media_dir = row[2]
+            if not force and row and row == (stat.st_size, stat.st_mtime_ns, media_dir):
+                return 0
+            segments = parse_transcript(path)
+            self._replace_source(conn, str(path), media_dir, stat.st_size, stat.st_mtime_ns, segments)
+        return len(segments)
+
+    def add_segments(self, source, media_file, segments, media_dir=None):
+        """
+        Index Whisper segments directly, replacing any earlier ones for source.
+
+        Args:
+            source: Stable key for this transcript, e.g. "streamlit_app/talk.mp3"
+            media_file: Name of the transcribed media file
+            segments: Whisper result segments (dicts with start, end, text)
+        """
+        rows = [
+            (media_file, float(seg.get("start", 0)), float(seg.get("end", 0)), seg.get("text", "").strip())
+            for seg in segments
+            if seg.get("text", "").strip()
+        ]
+        with self._lock, self._connect() as conn:
+            self._replace_source(conn, source, media_dir, None, None, rows)
+        return len(rows)
+
+    def remove(self, source):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT id FROM sources WHERE path = ?", (str(source),)).fetchone()
+            if row:
+                conn.execute("DELETE FROM segments WHERE source_id = ?", (row[0],))
+                conn.execute("DELETE FROM sources WHERE id = ?", (row[0],))
+
+    def search(self, query, limit=20, raw=False):
+        """
+        Find segments matching a query, best matches first.
+
+        Args:
+            query: Words to find as a phrase; with raw=True, an FTS5 query
+                (AND/OR/NEAR, "quoted phrases", prefix*)
+            limit: Maximum number of hits
+
+        Returns:
+            List of dicts with media_file, media_path, start, end, text,
+            snippet and source.
+        """
+        match = query if raw else phrase_query(query)
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT s.media_file, s.start, s.end, s.text,
+                       snippet(segments_fts, 0, '[', ']', '…', 12),
+                       src.path, src.media_dir
+                FROM segments_fts
+                JOIN segments s ON s.id = segments_fts.rowid
+                JOIN sources src ON src.id = s.source_id
+                WHERE segments_fts MATCH ?
+                ORDER BY bm25(segments_fts)
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+
+        return [
+            {
+                "media_file": media_file,
+                "media_path": str(Path(media_dir) / media_file) if media_dir else media_file,
+                "start": start,
+                "end": end,
+                "text": text,
+                "snippet": snippet,
+                "source": source,
+            }
+            for media_file, start, end, text, snippet, source, media_dir in rows
+        ]
+
+    def stats(self):
+        with self._connect() as conn:
+            sources, = conn.execute("SELECT COUNT(*) FROM sources").fetchone()
+            segments, seconds = conn.execute("SELECT COUNT(*), COALESCE(SUM(end - start), 0) FROM segments").fetchone()
+        return {"sources": sources, "segments": segments, "indexed_hours": seconds / 3600}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_transcript_index():
+    """Return the process-wide transcript index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TranscriptIndex(os.environ.get("TRANSCRIPT_INDEX_PATH", DEFAULT_INDEX_PATH))
+        return _index
+
+
+def _transcript_files(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.suffix.lower() in TRANSCRIPT_EXTENSIONS)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search transcripts")
+    parser.add_argument("--db", default=None, help="Index database (default: TRANSCRIPT_INDEX_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Index transcript files or directories")
+    add_parser.add_argument("paths", nargs="+")
+    add_parser.add_argument("--media-dir", default=None, help="Directory holding the transcribed media")
+    add_parser.add_argument("--force", action="store_true", help="Re-index unchanged files")
+
+    search_parser = subparsers.add_parser("search", help="Search indexed segments")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_mode = search_parser.add_mutually_exclusive_group()
+    search_mode.add_argument("--any", action="store_true", help="Match any of the words instead of the phrase")
+    search_mode.add_argument("--raw", action="store_true", help="Pass the query to FTS5 unchanged")
+
+    subparsers.add_parser("stats", help="Show index size")
+    args = parser.parse_args()
+
+    index = TranscriptIndex(args.db) if args.db else get_transcript_index()
+
+    if args.command == "add":
+        for path in _transcript_files(args.paths):
+            count = index.add_file(path, media_dir=args.media_dir, force=args.force)
+            print(f"{'Indexed ' + str(count) + ' segments from' if count else 'Up to date:'} {path}")
+    elif args.command == "search":
+        query = any_words_query(args.query) if args.any else args.query
+        start = time.perf_counter()
+        hits = index.search(query, limit=args.limit, raw=args.raw or args.any)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['media_path']} @ {format_timestamp(hit['start'])}: {hit['snippet']}")
+        print(f"\n{len(hits)} hits in {elapsed_ms:.1f} ms")
+    else:
+        stats = index.stats()
+        print(f"{stats['sources']} transcripts, {stats['segments']} segments, {stats['indexed_hours']:.1f} hours")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Per-stage timing of Whisper transcriptions.
+
+``TranscriptionProfiler`` wraps a loaded model and times each stage of
+``model.transcribe`` without changing its output:
+
+    audio_decode  FFmpeg decode of the input to 16 kHz PCM
+    mel           log-mel spectrogram computation
+    encoder       audio encoder forward passes (including language detection
+                  and fallback retries, which re-encode the window)
+    decoder       text decoder forward passes
+    other         everything else: tokenizer, timestamp logic, console output
+
+Every stage records wall and CPU time. A file record also holds the audio
+duration, the real-time factor (wall time / audio time) and the number of
+temperature-fallback decodes. Records are appended as JSON lines, can be
+exported in Prometheus text format, and are summarised in a table.
+"""
+
+import importlib
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import whisper
+
+STAGES = ["audio_decode", "mel", "encoder", "decoder", "other"]
+
+# Whisper's default schedule; the first temperature is the normal decode,
+# every later one is a fallback retry
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+class _StageTimer:
+    """Accumulates wall and CPU time for named stages"""
+
+    def __init__(self):
+        self.wall = {}
+        self.cpu = {}
+        self.calls = {}
+        self._open = {}
+
+    def start(self, stage):
+        self._open[stage] = (time.perf_counter(), time.process_time())
+
+    def stop(self, stage):
+        wall_start, cpu_start = self._open.pop(stage)
+        self.wall[stage] = self.wall.get(stage, 0.0) + time.perf_counter() - wall_start
+        self.cpu[stage] = self.cpu.get(stage, 0.0) + time.process_time() - cpu_start
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    @contextmanager
+    def measure(self, stage):
+        self.start(stage)
+        try:
+            yield
+        finally:
+            self.stop(stage)
+
+
+class TranscriptionProfiler:
+    """Runs model.transcribe with per-stage instrumentation"""
+
+    def __init__(self, model):
+        self.model = model
+
+    @contextmanager
+    def _instrumented(self, timer, decode_temperatures):
+        model = self.model
+        transcribe_module = importlib.import_module("whisper.transcribe")
+        original_mel = transcribe_module.log_mel_spectrogram
+        original_decode = model.decode
+
+        def timed_mel(*args, **kwargs):
+            with timer.measure("mel"):
+                return original_mel(*args, **kwargs)
+
+        def counted_decode(segment, options):
+            decode_temperatures.append(options.temperature)
+            return original_decode(segment, options)
+
+        handles = []
+        for stage, module in (("encoder", model.encoder), ("decoder", model.decoder)):
+            handles.append(module.register_forward_pre_hook(lambda *_, stage=stage: timer.start(stage)))
+            handles.append(module.register_forward_hook(lambda *_, stage=stage: timer.stop(stage)))
+
+        transcribe_module.log_mel_spectrogram = timed_mel
+        model.decode = counted_decode
+        try:
+            yield
+        finally:
+            transcribe_module.log_mel_spectrogram = original_mel
+            del model.decode
+            for handle in handles:
+                handle.remove()
+
+    def transcribe(self, audio_path, temperature=DEFAULT_TEMPERATURES, **kwargs):
+        """
+        Decode and transcribe one file, timing every stage.
+
+        Args:
+            audio_path: Media file to transcribe
+            temperature: Whisper temperature schedule
+            **kwargs: Passed on to model.transcribe
+
+        Returns:
+            Tuple of (whisper result, metrics record dict).
+        """
+        timer = _StageTimer()
+        decode_temperatures = []
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+        with timer.measure("audio_decode"):
+            audio = whisper.load_audio(str(audio_path))
+        with self._instrumented(timer, decode_temperatures):
+            result = self.model.transcribe(audio, temperature=temperature, **kwargs)
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        audio_seconds = len(audio) / whisper.audio.SAMPLE_RATE
+        first_temperature = temperature[0] if isinstance(temperature, (tuple, list)) else temperature
+
+        stages = {
+            stage: {"wall_seconds": timer.wall.get(stage, 0.0), "cpu_seconds": timer.cpu.get(stage, 0.0),
+                    "calls": timer.calls.get(stage, 0)}
+            for stage in STAGES[:-1]
+        }
+        stages["other"] = {
+            "wall_seconds": max(0.0, wall - sum(stage["wall_seconds"] for stage in stages.values())),
+            "cpu_seconds": max(0.0, cpu - sum(stage["cpu_seconds"] for stage in stages.values())),
+            "calls": 1,
+        }
+
+        record = {
+            "file": str(audio_path),
+            "timestamp": time.time(),
+            "audio_seconds": audio_seconds,
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "real_time_factor": wall / audio_seconds if audio_seconds else None,
+            "windows": sum(1 for t in decode_temperatures if t == first_temperature),
+            "fallback_decodes": sum(1 for t in decode_temperatures if t != first_temperature),
+            "segments": len(result.get("segments", [])),
+            "language": result.get("language"),
+            "stages": stages,
+        }
+        return result, record
+
+
+def append_jsonl(path, record):
+    """Append one metrics record as a JSON line"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def aggregate(records):
+    """Totals over a run: audio and wall seconds, fallbacks and per-stage times"""
+    totals = {
+        "files": len(records),
+        "audio_seconds": sum(r["audio_seconds"] for r in records),
+        "wall_seconds": sum(r["wall_seconds"] for r in records),
+        "cpu_seconds": sum(r["cpu_seconds"] for r in records),
+        "fallback_decodes": sum(r["fallback_decodes"] for r in records),
+        "stages": {
+            stage: {
+                "wall_seconds": sum(r["stages"][stage]["wall_seconds"] for r in records),
+                "cpu_seconds": sum(r["stages"][stage]["cpu_seconds"] for r in records),
+            }
+            for stage in STAGES
+        },
+    }
+    totals["real_time_factor"] = (
+        totals["wall_seconds"] / totals["audio_seconds"] if totals["audio_seconds"] else None
+    )
+    return totals
+
+
+def write_prometheus(path, records, job="transcribe_audi_tg"):
+    """Write run totals in Prometheus text exposition format (for the node_exporter textfile collector)"""
+    totals = aggregate(records)
+    labels = f'job="{job}"'
+    lines = [
+        "# HELP whisper_files_total Files transcribed.",
+        "# TYPE whisper_files_total counter",
+        f"whisper_files_total{{{labels}}} {totals['files']}",
+        "# HELP whisper_audio_seconds_total Seconds of audio transcribed.",
+        "# TYPE whisper_audio_seconds_total counter",
+        f"whisper_audio_seconds_total{{{labels}}} {totals['audio_seconds']:.3f}",
+        "# HELP whisper_fallback_decodes_total Temperature-fallback decode retries.",
+        "# TYPE whisper_fallback_decodes_total counter",
+        f"whisper_fallback_decodes_total{{{labels}}} {totals['fallback_decodes']}",
+        "# HELP whisper_real_time_factor Wall time divided by audio time over the run.",
+        "# TYPE whisper_real_time_factor gauge",
+        f"whisper_real_time_factor{{{labels}}} {totals['real_time_factor'] or 0:.4f}",
+        "# HELP whisper_stage_seconds_total Time spent per transcription stage.",
+        "# TYPE whisper_stage_seconds_total counter",
+    ]
+    for stage, times in totals["stages"].items():
+        for clock in ("wall", "cpu"):
+            lines.append(
+                f'whisper_stage_seconds_total{{{labels},stage="{stage}",clock="{clock}"}} '
+                f"{times[clock + '_seconds']:.3f}"
+            )
+
+    # Write then rename so the collector never reads a partial file
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def print_summary(records):
+    """Print the per-stage breakdown and real-time factors of a run"""
+    if not records:
+        return
+    totals = aggregate(records)
+    wall_total = totals["wall_seconds"] or 1.0
+
+    print(f"\n{'Stage':<14} {'Wall (s)':>10} {'CPU (s)':>10} {'Share':>7}")
+    for stage, times in totals["stages"].items():
+        print(f"{stage:<14} {times['wall_seconds']:>10.2f} {times['cpu_seconds']:>10.2f} "
+              f"{times['wall_seconds'] / wall_total:>7.1%}")
+    print(f"{'total':<14} {totals['wall_seconds']:>10.2f} {totals['cpu_seconds']:>10.2f}")
+
+    rtfs = sorted(r["real_time_factor"] for r in records if r["real_time_factor"] is not None)
+    print(f"\nFiles: {totals['files']}, audio: {totals['audio_seconds']:.1f}s, "
+          f"fallback decodes: {totals['fallback_decodes']}")
+    if rtfs:
+        print(f"Real-time factor: overall {totals['real_time_factor']:.3f}, "
+              f"median {rtfs[len(rtfs) // 2]:.3f}, worst {rtfs[-1]:.3f}")
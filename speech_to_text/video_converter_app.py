@@ -1,14 +1,21 @@
 import streamlit as st
-import subprocess
-import tempfile
+import uuid
 import os
 import shutil
 from pathlib import Path
 import time
 from datetime import datetime
+from file_server import get_file_server
+from shared_resources import configure_page, run_ffmpeg
+from scratch_manager import get_scratch_manager, AdmissionError
+from media_probe import probe_media, get_throughput_model, output_megapixels
+from rendition_ladder import (
+    LADDER_HEIGHTS, encoder_args, ladder_renditions, rung_resolution,
+    build_ladder_command, measure_decode_seconds, bundle_renditions
+)
 
 # Page configuration
-st.set_page_config(
+configure_page(
     page_title="Video Format Converter",
     page_icon="🎬",
     layout="wide",
@@ -65,6 +72,12 @@ st.markdown("""
 # Header
 st.markdown('<h1 class="main-header">🎬 Video Format Converter</h1>', unsafe_allow_html=True)
 
+# Scratch space owned by this browser session; any rerun counts as activity
+scratch = get_scratch_manager()
+if 'scratch_session_id' not in st.session_state:
+    st.session_state.scratch_session_id = uuid.uuid4().hex
+scratch.touch(st.session_state.scratch_session_id)
+
 # Sidebar for conversion settings
 with st.sidebar:
     st.header("⚙️ Conversion Settings")
@@ -137,7 +150,31 @@ with st.sidebar:
         remove_audio = st.checkbox("Remove Audio", value=False)
         compress_video = st.checkbox("Compress Video", value=True)
         preserve_metadata = st.checkbox("Preserve Metadata", value=True)
-    
+
+    st.markdown("---")
+
+    # Rendition ladder: several resolutions/formats from one decode
+    st.subheader("🪜 Rendition Ladder")
+    ladder_mode = st.checkbox(
+        "Encode a rendition ladder",
+        value=False,
+        help="Decode the upload once and encode every selected resolution and format in a single FFmpeg run"
+    )
+    if ladder_mode:
+        ladder_labels = st.multiselect(
+            "Resolutions:",
+            options=list(LADDER_HEIGHTS.keys()),
+            default=["1080p", "720p", "480p"]
+        )
+        ladder_formats = st.multiselect(
+            "Formats:",
+            options=list(output_formats.keys()),
+            default=[selected_format],
+            format_func=lambda x: output_formats[x]
+        )
+        if quality_preset == "custom" and resolution != "original":
+            st.caption("The custom resolution is ignored; each rung sets its own.")
+
     st.markdown("---")
     
     # Supported formats info
@@ -148,6 +185,16 @@ with st.sidebar:
     - Maximum file size: 1GB (configurable)
     """)
 
+    # Scratch disk metrics
+    with st.expander("💾 Scratch Disk"):
+        scratch_metrics = scratch.metrics()
+        st.metric("In Use", f"{scratch_metrics['usage_bytes'] / (1024*1024):.0f} MB",
+                  help=f"Quota: {scratch_metrics['quota_bytes'] / (1024*1024):.0f} MB")
+        st.metric("Disk Free", f"{scratch_metrics['disk_free_bytes'] / (1024*1024):.0f} MB")
+        st.metric("Reclaimed", f"{scratch_metrics['reclaimed_bytes_total'] / (1024*1024):.0f} MB",
+                  help=f"{scratch_metrics['reaped_sessions_total']} idle sessions reaped, "
+                       f"{scratch_metrics['rejected_jobs_total']} jobs rejected")
+
 # Main content area
 col1, col2 = st.columns([1, 1])
 
@@ -167,50 +214,224 @@ with col1:
         st.success(f"✅ File uploaded: {uploaded_file.name}")
         st.info(f"📊 File size: {file_size_mb:.2f} MB")
         
-        # Check file size limit
-        if file_size_mb > 1000:  # 1GB limit
-            st.error("❌ File size exceeds 1GB limit. Please choose a smaller file.")
+        # Pre-flight: stage the upload in scratch once, then probe it (cached per upload)
+        session_id = st.session_state.scratch_session_id
+        upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+        staging_error = None
+        preflight = None
+        try:
+            input_path = scratch.stage_upload(
+                session_id, upload_key, uploaded_file.getvalue(),
+                suffix=f".{uploaded_file.name.split('.')[-1]}"
+            )
+        except AdmissionError as e:
+            staging_error = f"❌ Upload rejected: {str(e)}"
+        except Exception as e:
+            staging_error = f"❌ Could not store the upload: {str(e)}"
+        
+        if staging_error is None:
+            try:
+                preflight = probe_media(input_path, cache_key=upload_key)
+            except Exception as e:
+                st.warning(f"⚠️ Could not analyse the input: {str(e)}")
+        
+        # Predicted cost of the selected preset
+        estimate = None
+        if preflight is not None:
+            output_resolution = resolution if quality_preset == "custom" else "original"
+            megapixels = output_megapixels(preflight, output_resolution)
+            if quality_preset == "custom":
+                bitrate_kbps = video_bitrate + (0 if remove_audio else audio_bitrate)
+            else:
+                bitrate_kbps = None
+            estimate = get_throughput_model().estimate(
+                f"video:{selected_format}:{quality_preset}",
+                "video",
+                preflight["duration"],
+                megapixels=megapixels,
+                fps=preflight["video"]["fps"] if preflight["video"] else None,
+                bitrate_kbps=bitrate_kbps,
+                crf_preset=quality_preset
+            )
+            
+            video_info = preflight["video"] or {}
+            audio_info = preflight["audio"] or {}
+            with st.expander("🔍 Pre-flight Analysis", expanded=True):
+                info_cols = st.columns(3)
+                info_cols[0].metric("Duration", f"{preflight['duration']:.1f}s")
+                info_cols[1].metric(
+                    "Resolution",
+                    f"{video_info['width']}x{video_info['height']}" if video_info.get('width') else "n/a"
+                )
+                info_cols[2].metric(
+                    "Bitrate",
+                    f"{preflight['bit_rate'] / 1000:.0f} kbps" if preflight['bit_rate'] else "n/a"
+                )
+                st.caption(
+                    f"Video: {video_info.get('codec', 'none')} @ {video_info.get('fps', 0):.2f} fps | "
+                    f"Audio: {audio_info.get('codec', 'none')}"
+                )
+                estimate_cols = st.columns(2)
+                estimate_cols[0].metric(
+                    "Predicted Size",
+                    f"{estimate['output_bytes'] / (1024*1024):.1f} MB" if estimate['output_bytes'] else "unknown"
+                )
+                estimate_cols[1].metric("Predicted Time", f"{estimate['seconds']:.1f}s")
+                if not estimate['calibrated']:
+                    st.caption("Estimates use defaults until this preset has run on this machine.")
+        
+        if staging_error:
+            st.error(staging_error)
+        elif ladder_mode:
+            source_video = (preflight["video"] if preflight is not None else None) or {}
+            renditions, skipped_labels = ladder_renditions(source_video.get("height"), ladder_labels, ladder_formats)
+            if skipped_labels:
+                st.caption(f"Skipping {', '.join(skipped_labels)}: taller than the {source_video['height']}p source.")
+
+            if not renditions:
+                st.warning("⚠️ Select at least one resolution and format for the ladder.")
+            elif st.button(f"🪜 Encode {len(renditions)} Renditions", type="primary", use_container_width=True):
+                with st.spinner(f"🪜 Encoding {len(renditions)} renditions from one decode..."):
+                    reservation = None
+                    zip_path = None
+                    try:
+                        # Admit every rendition plus the zip that bundles them
+                        expected_bytes = 0
+                        if preflight is not None:
+                            for rendition in renditions:
+                                rung_estimate = get_throughput_model().estimate(
+                                    f"video:{rendition['format']}:{quality_preset}",
+                                    "video",
+                                    preflight["duration"],
+                                    megapixels=output_megapixels(preflight, rung_resolution(source_video, rendition["height"])),
+                                    fps=source_video.get("fps"),
+                                    bitrate_kbps=bitrate_kbps,
+                                    crf_preset=quality_preset
+                                )
+                                if not rung_estimate['output_bytes']:
+                                    expected_bytes = 0
+                                    break
+                                expected_bytes += rung_estimate['output_bytes']
+                        if not expected_bytes:
+                            expected_bytes = uploaded_file.size * len(renditions)
+                        reservation = scratch.admit(session_id, int(expected_bytes * 1.2) * 2)
+
+                        # Replace this session's previous result instead of leaving it behind
+                        if st.session_state.get('converted_file_path'):
+                            get_file_server().unregister(st.session_state.converted_download_token)
+                            scratch.remove_file(st.session_state.converted_file_path)
+                            st.session_state.converted_file_path = None
+
+                        original_name = Path(uploaded_file.name).stem
+                        for rendition in renditions:
+                            rendition["path"] = scratch.create_file(session_id, suffix=f".{rendition['format']}")
+
+                        cmd = build_ladder_command(
+                            input_path,
+                            renditions,
+                            quality_preset,
+                            video_bitrate=video_bitrate if quality_preset == "custom" else None,
+                            audio_bitrate=audio_bitrate if quality_preset == "custom" else None,
+                            remove_audio=remove_audio,
+                            faststart=compress_video and quality_preset != "custom",
+                            preserve_metadata=preserve_metadata
+                        )
+
+                        start_time = time.time()
+                        result = run_ffmpeg(cmd, capture_output=True, text=True)
+                        end_time = time.time()
+
+                        if result.returncode == 0:
+                            # Sequential runs would decode the source once per rendition
+                            decode_seconds = None
+                            if preflight is not None:
+                                decode_seconds = measure_decode_seconds(input_path, preflight["duration"])
+
+                            rendition_sizes = []
+                            for rendition in renditions:
+                                rendition["name"] = f"{original_name}_{rendition['label']}.{rendition['format']}"
+                                rendition_sizes.append({
+                                    "name": rendition["name"],
+                                    "size_mb": os.path.getsize(rendition["path"]) / (1024*1024),
+                                })
+                            zip_path = scratch.create_file(session_id, suffix=".zip")
+                            bundle_renditions(zip_path, [(rendition["path"], rendition["name"]) for rendition in renditions])
+
+                            zip_filename = f"{original_name}_ladder.zip"
+                            st.session_state.converted_file_path = zip_path
+                            st.session_state.converted_filename = zip_filename
+                            st.session_state.converted_download_token = get_file_server().register(
+                                zip_path, zip_filename, mime="application/zip"
+                            )
+                            st.session_state.conversion_time = end_time - start_time
+                            st.session_state.converted_size_mb = os.path.getsize(zip_path) / (1024*1024)
+                            st.session_state.converted_source_name = uploaded_file.name
+                            st.session_state.converted_source_size_mb = uploaded_file.size / (1024*1024)
+                            st.session_state.converted_ladder = {
+                                "renditions": rendition_sizes,
+                                "decode_seconds": decode_seconds,
+                                "decode_saved_seconds": decode_seconds * (len(renditions) - 1) if decode_seconds else None,
+                            }
+
+                            st.success(f"✅ {len(renditions)} renditions encoded from a single decode!")
+
+                        else:
+                            st.error(f"❌ Ladder encode failed: {result.stderr}")
+
+                    except AdmissionError as e:
+                        st.error(f"❌ Job rejected: {str(e)}")
+
+                    except Exception as e:
+                        st.error(f"❌ Error during ladder encode: {str(e)}")
+                        if zip_path and st.session_state.get('converted_file_path') == zip_path:
+                            if st.session_state.get('converted_download_token'):
+                                get_file_server().unregister(st.session_state.converted_download_token)
+                            st.session_state.converted_file_path = None
+
+                    finally:
+                        # Renditions never outlive the encode; the zip only if it became the result
+                        for rendition in renditions:
+                            scratch.remove_file(rendition.get("path"))
+                        if zip_path and st.session_state.get('converted_file_path') != zip_path:
+                            scratch.remove_file(zip_path)
+                        if reservation is not None:
+                            scratch.release(reservation)
         else:
             # Convert button
             if st.button("🔄 Convert Video", type="primary", use_container_width=True):
                 with st.spinner("🔄 Converting video..."):
+                    reservation = None
                     try:
-                        # Create temporary files
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as input_tmp:
-                            input_tmp.write(uploaded_file.getvalue())
-                            input_path = input_tmp.name
+                        # Admit the job on its predicted output size, falling back to the upload size
+                        if estimate is not None and estimate['output_bytes']:
+                            expected_bytes = int(estimate['output_bytes'] * 1.2)
+                        else:
+                            expected_bytes = uploaded_file.size
+                        reservation = scratch.admit(session_id, expected_bytes)
+                        
+                        # Replace this session's previous result instead of leaving it behind
+                        if st.session_state.get('converted_file_path'):
+                            get_file_server().unregister(st.session_state.converted_download_token)
+                            scratch.remove_file(st.session_state.converted_file_path)
+                            st.session_state.converted_file_path = None
                         
                         # Generate output filename
                         original_name = Path(uploaded_file.name).stem
                         output_filename = f"{original_name}_converted.{selected_format}"
                         
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{selected_format}") as output_tmp:
-                            output_path = output_tmp.name
+                        output_path = scratch.create_file(session_id, suffix=f".{selected_format}")
                         
                         # Build FFmpeg command
                         cmd = ["ffmpeg", "-i", input_path, "-y"]  # -y to overwrite output file
                         
-                        # Add quality settings
+                        # Add quality and format-specific settings
                         if quality_preset == "custom":
-                            cmd.extend(["-b:v", f"{video_bitrate}k"])
-                            cmd.extend(["-b:a", f"{audio_bitrate}k"])
+                            cmd.extend(encoder_args(selected_format, quality_preset, video_bitrate, audio_bitrate))
                             
                             if resolution != "original":
                                 cmd.extend(["-s", resolution])
-                        elif quality_preset == "high":
-                            cmd.extend(["-crf", "18", "-preset", "slow"])
-                        elif quality_preset == "medium":
-                            cmd.extend(["-crf", "23", "-preset", "medium"])
-                        elif quality_preset == "low":
-                            cmd.extend(["-crf", "28", "-preset", "fast"])
-                        
-                        # Add format-specific options
-                        if selected_format == "mp4":
-                            cmd.extend(["-c:v", "libx264", "-c:a", "aac"])
-                        elif selected_format == "webm":
-                            cmd.extend(["-c:v", "libvpx-vp9", "-c:a", "libopus"])
-                        elif selected_format == "avi":
-                            cmd.extend(["-c:v", "libx264", "-c:a", "mp3"])
+                        else:
+                            cmd.extend(encoder_args(selected_format, quality_preset))
                         
                         # Advanced options
                         if remove_audio:
@@ -227,38 +448,56 @@ with col1:
                         
                         # Run FFmpeg command
                         start_time = time.time()
-                        result = subprocess.run(cmd, capture_output=True, text=True)
+                        result = run_ffmpeg(cmd, capture_output=True, text=True)
                         end_time = time.time()
                         
-                        # Clean up input file
-                        os.unlink(input_path)
-                        
                         if result.returncode == 0:
                             # Get output file size
                             output_size = os.path.getsize(output_path)
                             output_size_mb = output_size / (1024*1024)
                             
+                            # Calibrate future estimates with this run
+                            if preflight is not None:
+                                get_throughput_model().record(
+                                    f"video:{selected_format}:{quality_preset}",
+                                    "video",
+                                    preflight["duration"],
+                                    megapixels,
+                                    end_time - start_time,
+                                    output_size
+                                )
+                            
                             # Store in session state
                             st.session_state.converted_file_path = output_path
                             st.session_state.converted_filename = output_filename
+                            st.session_state.converted_download_token = get_file_server().register(
+                                output_path, output_filename, mime=f"video/{selected_format}"
+                            )
                             st.session_state.conversion_time = end_time - start_time
-                            st.session_state.output_size_mb = output_size_mb
+                            st.session_state.converted_size_mb = output_size_mb
+                            st.session_state.converted_source_name = uploaded_file.name
+                            st.session_state.converted_source_size_mb = uploaded_file.size / (1024*1024)
+                            st.session_state.converted_ladder = None
                             
                             st.success("✅ Video converted successfully!")
                             
                         else:
                             st.error(f"❌ Conversion failed: {result.stderr}")
                             # Clean up output file if it exists
-                            if os.path.exists(output_path):
-                                os.unlink(output_path)
+                            scratch.remove_file(output_path)
+                    
+                    except AdmissionError as e:
+                        st.error(f"❌ Job rejected: {str(e)}")
                     
                     except Exception as e:
                         st.error(f"❌ Error during conversion: {str(e)}")
                         # Clean up files
-                        if 'input_path' in locals() and os.path.exists(input_path):
-                            os.unlink(input_path)
-                        if 'output_path' in locals() and os.path.exists(output_path):
-                            os.unlink(output_path)
+                        if 'output_path' in locals():
+                            scratch.remove_file(output_path)
+                    
+                    finally:
+                        if reservation is not None:
+                            scratch.release(reservation)
 
 with col2:
     st.header("📥 Download Converted Video")
@@ -267,31 +506,34 @@ with col2:
         # Display conversion info
         st.markdown('<div class="conversion-box">', unsafe_allow_html=True)
         
-        st.markdown(f"**📁 Original File:** {uploaded_file.name}")
+        st.markdown(f"**📁 Original File:** {st.session_state.converted_source_name}")
         st.markdown(f"**📁 Converted File:** {st.session_state.converted_filename}")
         st.markdown(f"**⏱️ Conversion Time:** {st.session_state.conversion_time:.2f} seconds")
-        st.markdown(f"**📊 Output Size:** {st.session_state.output_size_mb:.2f} MB")
-        st.markdown(f"**🎯 Format:** {selected_format.upper()}")
+        st.markdown(f"**📊 Output Size:** {st.session_state.converted_size_mb:.2f} MB")
+        ladder = st.session_state.get('converted_ladder')
+        if ladder:
+            st.markdown(f"**🪜 Renditions:** {len(ladder['renditions'])}")
+            for rendition in ladder['renditions']:
+                st.markdown(f"- {rendition['name']} ({rendition['size_mb']:.2f} MB)")
+        else:
+            st.markdown(f"**🎯 Format:** {selected_format.upper()}")
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        # Download button
-        with open(st.session_state.converted_file_path, "rb") as file:
-            st.download_button(
-                label="📥 Download Converted Video",
-                data=file.read(),
-                file_name=st.session_state.converted_filename,
-                mime=f"video/{selected_format}",
-                use_container_width=True,
-                type="primary"
-            )
+        # Download link, streamed by the local file server so reruns never read the file
+        st.link_button(
+            label="📥 Download Renditions (ZIP)" if ladder else "📥 Download Converted Video",
+            url=get_file_server().url_for(st.session_state.converted_download_token),
+            use_container_width=True,
+            type="primary"
+        )
         
         # Clean up button
         if st.button("🗑️ Clear Results", use_container_width=True):
-            if os.path.exists(st.session_state.converted_file_path):
-                os.unlink(st.session_state.converted_file_path)
+            scratch.remove_file(st.session_state.converted_file_path)
+            get_file_server().unregister(st.session_state.converted_download_token)
             # Clear session state
-            for key in ['converted_file_path', 'converted_filename', 'conversion_time', 'output_size_mb']:
+            for key in ['converted_file_path', 'converted_filename', 'conversion_time', 'converted_size_mb', 'converted_download_token', 'converted_source_name', 'converted_source_size_mb', 'converted_ladder']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
@@ -310,12 +552,26 @@ if 'conversion_time' in st.session_state:
         st.metric("Conversion Time", f"{st.session_state.conversion_time:.2f}s")
     
     with col2:
-        original_size = uploaded_file.size / (1024*1024)
-        compression_ratio = (original_size - st.session_state.output_size_mb) / original_size * 100
-        st.metric("Size Reduction", f"{compression_ratio:.1f}%")
+        ladder = st.session_state.get('converted_ladder')
+        if ladder:
+            # Each extra sequential run would have decoded the whole source again
+            if ladder['decode_saved_seconds'] is not None:
+                st.metric(
+                    "Decode Time Saved",
+                    f"{ladder['decode_saved_seconds']:.2f}s",
+                    help=f"One decode of the source takes about {ladder['decode_seconds']:.2f}s; "
+                         f"{len(ladder['renditions'])} separate conversions would decode it "
+                         f"{len(ladder['renditions'])} times."
+                )
+            else:
+                st.metric("Decode Time Saved", "n/a")
+        else:
+            original_size = st.session_state.converted_source_size_mb
+            compression_ratio = (original_size - st.session_state.converted_size_mb) / original_size * 100
+            st.metric("Size Reduction", f"{compression_ratio:.1f}%")
     
     with col3:
-        st.metric("Output Size", f"{st.session_state.output_size_mb:.2f} MB")
+        st.metric("Output Size", f"{st.session_state.converted_size_mb:.2f} MB")
 
 # Footer
 st.markdown("---")
@@ -1,14 +1,18 @@
 import streamlit as st
-import subprocess
-import tempfile
+import uuid
 import os
 import shutil
 from pathlib import Path
 import time
 from datetime import datetime
+from file_server import get_file_server
+from shared_resources import configure_page, run_ffmpeg
+from scratch_manager import get_scratch_manager, AdmissionError
+from media_probe import probe_media, get_throughput_model
+from audio_filters import build_audio_filter_graph, measure_loudness
 
 # Page configuration
-st.set_page_config(
+configure_page(
     page_title="Video to Audio Converter",
     page_icon="🎵",
     layout="wide",
@@ -65,6 +69,12 @@ st.markdown("""
 # Header
 st.markdown('<h1 class="main-header">🎵 Video to Audio Converter</h1>', unsafe_allow_html=True)
 
+# Scratch space owned by this browser session; any rerun counts as activity
+scratch = get_scratch_manager()
+if 'scratch_session_id' not in st.session_state:
+    st.session_state.scratch_session_id = uuid.uuid4().hex
+scratch.touch(st.session_state.scratch_session_id)
+
 # Sidebar for conversion settings
 with st.sidebar:
     st.header("⚙️ Audio Settings")
@@ -134,6 +144,12 @@ with st.sidebar:
     # Advanced options
     with st.expander("🔧 Advanced Options"):
         normalize_audio = st.checkbox("Normalize Audio", value=True, help="Adjust volume levels")
+        two_pass_normalize = st.checkbox(
+            "Two-pass Normalization",
+            value=False,
+            disabled=not normalize_audio,
+            help="Measure loudness first (fast analysis pass), then apply exact corrections"
+        )
         remove_silence = st.checkbox("Remove Silence", value=False, help="Remove silent parts")
         fade_in_out = st.checkbox("Add Fade In/Out", value=False, help="Add 1-second fade effects")
     
@@ -147,6 +163,16 @@ with st.sidebar:
     - Maximum file size: 1GB (configurable)
     """)
 
+    # Scratch disk metrics
+    with st.expander("💾 Scratch Disk"):
+        scratch_metrics = scratch.metrics()
+        st.metric("In Use", f"{scratch_metrics['usage_bytes'] / (1024*1024):.0f} MB",
+                  help=f"Quota: {scratch_metrics['quota_bytes'] / (1024*1024):.0f} MB")
+        st.metric("Disk Free", f"{scratch_metrics['disk_free_bytes'] / (1024*1024):.0f} MB")
+        st.metric("Reclaimed", f"{scratch_metrics['reclaimed_bytes_total'] / (1024*1024):.0f} MB",
+                  help=f"{scratch_metrics['reaped_sessions_total']} idle sessions reaped, "
+                       f"{scratch_metrics['rejected_jobs_total']} jobs rejected")
+
 # Main content area
 col1, col2 = st.columns([1, 1])
 
@@ -166,28 +192,97 @@ with col1:
         st.success(f"✅ File uploaded: {uploaded_file.name}")
         st.info(f"📊 File size: {file_size_mb:.2f} MB")
         
-        # Check file size limit
-        if file_size_mb > 1000:  # 1GB limit
-            st.error("❌ File size exceeds 1GB limit. Please choose a smaller file.")
+        # Pre-flight: stage the upload in scratch once, then probe it (cached per upload)
+        session_id = st.session_state.scratch_session_id
+        upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+        staging_error = None
+        preflight = None
+        try:
+            input_path = scratch.stage_upload(
+                session_id, upload_key, uploaded_file.getvalue(),
+                suffix=f".{uploaded_file.name.split('.')[-1]}"
+            )
+        except AdmissionError as e:
+            staging_error = f"❌ Upload rejected: {str(e)}"
+        except Exception as e:
+            staging_error = f"❌ Could not store the upload: {str(e)}"
+        
+        if staging_error is None:
+            try:
+                preflight = probe_media(input_path, cache_key=upload_key)
+            except Exception as e:
+                st.warning(f"⚠️ Could not analyse the input: {str(e)}")
+        
+        # Predicted cost of the selected preset
+        estimate = None
+        if preflight is not None and preflight["audio"] is None:
+            st.warning("⚠️ This file has no audio stream.")
+        elif preflight is not None:
+            audio_info = preflight["audio"]
+            if selected_format == "wav":
+                # PCM size follows from the sample rate and channel count
+                output_rate = int(sample_rate) if quality_preset == "custom" and sample_rate != "original" else audio_info["sample_rate"]
+                output_channels = {"mono": 1, "stereo": 2}.get(channels, audio_info["channels"]) if quality_preset == "custom" else audio_info["channels"]
+                bitrate_kbps = (output_rate or 44100) * (output_channels or 2) * 16 / 1000
+            elif selected_format == "flac":
+                bitrate_kbps = None
+            elif quality_preset == "custom":
+                bitrate_kbps = audio_bitrate
+            else:
+                bitrate_kbps = {"high": 320, "medium": 192, "low": 128}[quality_preset]
+            estimate = get_throughput_model().estimate(
+                f"audio:{selected_format}:{quality_preset}",
+                "audio",
+                preflight["duration"],
+                bitrate_kbps=bitrate_kbps
+            )
+            
+            with st.expander("🔍 Pre-flight Analysis", expanded=True):
+                info_cols = st.columns(3)
+                info_cols[0].metric("Duration", f"{preflight['duration']:.1f}s")
+                info_cols[1].metric("Audio Codec", audio_info["codec"] or "n/a")
+                info_cols[2].metric(
+                    "Sample Rate",
+                    f"{audio_info['sample_rate']} Hz" if audio_info["sample_rate"] else "n/a"
+                )
+                estimate_cols = st.columns(2)
+                estimate_cols[0].metric(
+                    "Predicted Size",
+                    f"{estimate['output_bytes'] / (1024*1024):.1f} MB" if estimate['output_bytes'] else "unknown"
+                )
+                estimate_cols[1].metric("Predicted Time", f"{estimate['seconds']:.1f}s")
+                if not estimate['calibrated']:
+                    st.caption("Estimates use defaults until this preset has run on this machine.")
+        
+        if staging_error:
+            st.error(staging_error)
         else:
             # Convert button
             if st.button("🎵 Extract Audio", type="primary", use_container_width=True):
                 with st.spinner("🔄 Extracting audio from video..."):
+                    reservation = None
                     try:
-                        # Create temporary files
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as input_tmp:
-                            input_tmp.write(uploaded_file.getvalue())
-                            input_path = input_tmp.name
+                        # Admit the job on its predicted output size, falling back to the upload size
+                        if estimate is not None and estimate['output_bytes']:
+                            expected_bytes = int(estimate['output_bytes'] * 1.2)
+                        else:
+                            expected_bytes = uploaded_file.size
+                        reservation = scratch.admit(session_id, expected_bytes)
+                        
+                        # Replace this session's previous result instead of leaving it behind
+                        if st.session_state.get('extracted_audio_path'):
+                            get_file_server().unregister(st.session_state.extracted_download_token)
+                            scratch.remove_file(st.session_state.extracted_audio_path)
+                            st.session_state.extracted_audio_path = None
                         
                         # Generate output filename
                         original_name = Path(uploaded_file.name).stem
                         output_filename = f"{original_name}_audio.{selected_format}"
                         
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{selected_format}") as output_tmp:
-                            output_path = output_tmp.name
+                        output_path = scratch.create_file(session_id, suffix=f".{selected_format}")
                         
-                        # Build FFmpeg command
-                        cmd = ["ffmpeg", "-i", input_path, "-y"]  # -y to overwrite output file
+                        # Build FFmpeg command (-vn skips decoding the video stream)
+                        cmd = ["ffmpeg", "-i", input_path, "-y", "-vn"]  # -y to overwrite output file
                         
                         # Add audio quality settings
                         if quality_preset == "custom":
@@ -222,53 +317,75 @@ with col1:
                         elif selected_format == "aac":
                             cmd.extend(["-c:a", "aac"])
                         
-                        # Advanced audio processing
-                        if normalize_audio:
-                            cmd.extend(["-af", "loudnorm"])
-                        
-                        if remove_silence:
-                            cmd.extend(["-af", "silenceremove=start_periods=1:start_duration=1:start_threshold=-50dB"])
+                        # Advanced audio processing, chained into a single filter graph
+                        loudnorm_measured = None
+                        if normalize_audio and two_pass_normalize:
+                            loudnorm_measured = measure_loudness(input_path, remove_silence=remove_silence)
                         
-                        if fade_in_out:
-                            cmd.extend(["-af", "afade=t=in:ss=0:d=1,afade=t=out:st=-1:d=1"])
+                        audio_filter = build_audio_filter_graph(
+                            normalize=normalize_audio,
+                            remove_silence=remove_silence,
+                            fade=fade_in_out,
+                            duration=preflight["duration"] if fade_in_out and preflight else None,
+                            loudnorm_measured=loudnorm_measured
+                        )
+                        if audio_filter:
+                            cmd.extend(["-af", audio_filter])
                         
                         # Add output path
                         cmd.append(output_path)
                         
                         # Run FFmpeg command
                         start_time = time.time()
-                        result = subprocess.run(cmd, capture_output=True, text=True)
+                        result = run_ffmpeg(cmd, capture_output=True, text=True)
                         end_time = time.time()
                         
-                        # Clean up input file
-                        os.unlink(input_path)
-                        
                         if result.returncode == 0:
                             # Get output file size
                             output_size = os.path.getsize(output_path)
                             output_size_mb = output_size / (1024*1024)
                             
+                            # Calibrate future estimates with this run
+                            if preflight is not None:
+                                get_throughput_model().record(
+                                    f"audio:{selected_format}:{quality_preset}",
+                                    "audio",
+                                    preflight["duration"],
+                                    None,
+                                    end_time - start_time,
+                                    output_size
+                                )
+                            
                             # Store in session state
                             st.session_state.extracted_audio_path = output_path
                             st.session_state.extracted_filename = output_filename
+                            st.session_state.extracted_download_token = get_file_server().register(
+                                output_path, output_filename, mime=f"audio/{selected_format}"
+                            )
                             st.session_state.extraction_time = end_time - start_time
-                            st.session_state.output_size_mb = output_size_mb
+                            st.session_state.extracted_size_mb = output_size_mb
+                            st.session_state.extracted_source_name = uploaded_file.name
+                            st.session_state.extracted_source_size_mb = uploaded_file.size / (1024*1024)
                             
                             st.success("✅ Audio extracted successfully!")
                             
                         else:
                             st.error(f"❌ Audio extraction failed: {result.stderr}")
                             # Clean up output file if it exists
-                            if os.path.exists(output_path):
-                                os.unlink(output_path)
+                            scratch.remove_file(output_path)
+                    
+                    except AdmissionError as e:
+                        st.error(f"❌ Job rejected: {str(e)}")
                     
                     except Exception as e:
                         st.error(f"❌ Error during audio extraction: {str(e)}")
                         # Clean up files
-                        if 'input_path' in locals() and os.path.exists(input_path):
-                            os.unlink(input_path)
-                        if 'output_path' in locals() and os.path.exists(output_path):
-                            os.unlink(output_path)
+                        if 'output_path' in locals():
+                            scratch.remove_file(output_path)
+                    
+                    finally:
+                        if reservation is not None:
+                            scratch.release(reservation)
 
 with col2:
     st.header("📥 Download Extracted Audio")
@@ -277,31 +394,28 @@ with col2:
         # Display extraction info
         st.markdown('<div class="conversion-box">', unsafe_allow_html=True)
         
-        st.markdown(f"**📁 Original Video:** {uploaded_file.name}")
+        st.markdown(f"**📁 Original Video:** {st.session_state.extracted_source_name}")
         st.markdown(f"**🎵 Audio File:** {st.session_state.extracted_filename}")
         st.markdown(f"**⏱️ Extraction Time:** {st.session_state.extraction_time:.2f} seconds")
-        st.markdown(f"**📊 Audio Size:** {st.session_state.output_size_mb:.2f} MB")
+        st.markdown(f"**📊 Audio Size:** {st.session_state.extracted_size_mb:.2f} MB")
         st.markdown(f"**🎯 Format:** {selected_format.upper()}")
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        # Download button
-        with open(st.session_state.extracted_audio_path, "rb") as file:
-            st.download_button(
-                label="📥 Download Audio File",
-                data=file.read(),
-                file_name=st.session_state.extracted_filename,
-                mime=f"audio/{selected_format}",
-                use_container_width=True,
-                type="primary"
-            )
+        # Download link, streamed by the local file server so reruns never read the file
+        st.link_button(
+            label="📥 Download Audio File",
+            url=get_file_server().url_for(st.session_state.extracted_download_token),
+            use_container_width=True,
+            type="primary"
+        )
         
         # Clean up button
         if st.button("🗑️ Clear Results", use_container_width=True):
-            if os.path.exists(st.session_state.extracted_audio_path):
-                os.unlink(st.session_state.extracted_audio_path)
+            scratch.remove_file(st.session_state.extracted_audio_path)
+            get_file_server().unregister(st.session_state.extracted_download_token)
             # Clear session state
-            for key in ['extracted_audio_path', 'extracted_filename', 'extraction_time', 'output_size_mb']:
+            for key in ['extracted_audio_path', 'extracted_filename', 'extraction_time', 'extracted_size_mb', 'extracted_download_token', 'extracted_source_name', 'extracted_source_size_mb']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
@@ -320,12 +434,12 @@ if 'extraction_time' in st.session_state:
         st.metric("Extraction Time", f"{st.session_state.extraction_time:.2f}s")
     
     with col2:
-        original_size = uploaded_file.size / (1024*1024)
-        compression_ratio = (original_size - st.session_state.output_size_mb) / original_size * 100
+        original_size = st.session_state.extracted_source_size_mb
+        compression_ratio = (original_size - st.session_state.extracted_size_mb) / original_size * 100
         st.metric("Size Reduction", f"{compression_ratio:.1f}%")
     
     with col3:
-        st.metric("Audio Size", f"{st.session_state.output_size_mb:.2f} MB")
+        st.metric("Audio Size", f"{st.session_state.extracted_size_mb:.2f} MB")
 
 # Usage tips
 st.markdown("---")
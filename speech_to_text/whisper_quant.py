@@ -0,0 +1,101 @@
+"""
+Dynamic int8 quantization of Whisper models for CPU-only hosts.
+
+``load_quantized_model`` loads a full-precision model once, replaces its
+linear layers (attention projections and MLPs, where almost all of the
+compute is) with dynamically quantized int8 versions and saves the result.
+Later calls rebuild the model straight from that cache, without reading the
+fp32 checkpoint or quantizing again.
+
+Configuration (environment variables):
+    WHISPER_INT8_CACHE: Directory holding the quantized weights
+        (default: ~/.cache/speech_to_text/whisper_int8)
+"""
+
+import os
+import threading
+from dataclasses import asdict
+from pathlib import Path
+
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "speech_to_text" / "whisper_int8"
+
+_cache_lock = threading.Lock()
+
+
+def _cache_path(model_name, cache_dir=None):
+    cache_dir = Path(cache_dir or os.environ.get("WHISPER_INT8_CACHE", DEFAULT_CACHE_DIR))
+    # Packed int8 weights are only portable between identical torch builds
+    return cache_dir / f"{model_name}-int8-torch{torch.__version__}.pt"
+
+
+def _quantize(model):
+    """Quantize the linear layers of a CPU model in place and return it"""
+    # Whisper subclasses nn.Linear only to cast weights for fp16; quantize_dynamic
+    # matches exact types, so turn them back into plain nn.Linear first
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _build_skeleton(model_name, dims):
+    """An unquantized model of the right shape, ready to receive cached int8 weights"""
+    model = Whisper(ModelDimensions(**dims))
+    alignment_heads = whisper._ALIGNMENT_HEADS.get(model_name)
+    if alignment_heads:
+        model.set_alignment_heads(alignment_heads)
+    return model
+
+
+def load_quantized_model(model_name, cache_dir=None):
+    """
+    Load a Whisper model with int8 linear layers, for CPU inference.
+
+    Args:
+        model_name: Whisper model size, e.g. "medium"
+        cache_dir: Where quantized weights are kept (default: WHISPER_INT8_CACHE)
+
+    Returns:
+        Whisper model on the CPU in eval mode.
+    """
+    path = _cache_path(model_name, cache_dir)
+
+    with _cache_lock:
+        if path.exists():
+            try:
+                checkpoint = torch.load(path, map_location="cpu", weights_only=False)
+                model = _quantize(_build_skeleton(model_name, checkpoint["dims"]))
+                model.load_state_dict(checkpoint["state_dict"])
+                return model.eval()
+            except Exception as e:
+                print(f"Ignoring unreadable quantized cache {path}: {e}")
+
+        model = _quantize(whisper.load_model(model_name, device="cpu")).eval()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        torch.save({"dims": asdict(model.dims), "state_dict": model.state_dict()}, tmp_path)
+        os.replace(tmp_path, path)
+        return model
+
+
+def load_model(model_name, int8=False):
+    """whisper.load_model, or the quantized CPU variant when int8 is set"""
+    if int8:
+        return load_quantized_model(model_name)
+    return whisper.load_model(model_name)
+
+
+def model_size_bytes(model):
+    """Serialized size of a model's weights, used to compare fp32 and int8 memory"""
+    size = 0
+    for tensor in model.state_dict().values():
+        if isinstance(tensor, torch.Tensor):
+            size += tensor.nelement() * tensor.element_size()
+        elif isinstance(tensor, tuple):
+            # Packed quantized linear params come back as (weight, bias)
+            size += sum(t.nelement() * t.element_size() for t in tensor if isinstance(t, torch.Tensor))
+    return size
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Asyncio orchestrator for the playlist downloader.
+
+Runs many yt-dlp jobs (entry downloads, caption fetches, postprocessing) from
+one event loop, so the downloader can be embedded in async services:
+
+    async with AsyncDownloader("./downloads", concurrency=8) as downloader:
+        results = await downloader.download_playlist(url, audio_only=True)
+
+- Blocking yt-dlp calls run in a thread pool sized to the concurrency limit.
+- Jobs of one batch run in a task group: when the batch is cancelled, every
+  job in it is cancelled and awaited.
+- Each attempt has an optional timeout; failed attempts are retried with
+  exponential backoff. Errors yt-dlp reports as expected (private or removed
+  videos) are not retried.
+- A cancelled or timed-out download is stopped at its next progress callback
+  and the worker thread is awaited, so the partial .part file is closed and
+  left in place; the next attempt or run resumes it.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yt_dlp
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from captions import entry_captions
+from download_playlist import build_download_options, caption_options, list_playlist_flat
+
+console = Console()
+
+
+class _TaskGroup:
+    """asyncio.TaskGroup for Python < 3.11: the first failure cancels the other tasks."""
+
+    async def __aenter__(self):
+        self._tasks = []
+        return self
+
+    def create_task(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.append(task)
+        return task
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        return False
+
+
+TaskGroup = getattr(asyncio, "TaskGroup", _TaskGroup)
+
+
+async def _stop(future, cancel_event: threading.Event):
+    """Ask a running job to stop and wait until its thread has returned."""
+    cancel_event.set()
+    await asyncio.wait([future])
+    # Collect the DownloadCancelled raised in the thread
+    future.exception()
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """False for errors that will not go away on retry (unavailable, private, removed)."""
+    if isinstance(error, yt_dlp.utils.DownloadError) and error.exc_info:
+        error = error.exc_info[1]
+    return not (isinstance(error, yt_dlp.utils.ExtractorError) and error.expected)
+
+
+class AsyncDownloader:
+    """
+    Run yt-dlp jobs concurrently with timeouts, retries and clean cancellation.
+
+    Args:
+        output_path: Directory to save downloads
+        concurrency: Jobs running at the same time (also the thread pool size)
+        timeout: Seconds allowed per attempt (None for no limit)
+        retries: Attempts after the first one
+        backoff: Delay before the first retry; doubles on every retry
+        max_backoff: Upper bound for the retry delay
+    """
+
+    def __init__(
+        self,
+        output_path: str = "./downloads",
+        concurrency: int = 4,
+        timeout: float = None,
+        retries: int = 3,
+        backoff: float = 2.0,
+        max_backoff: float = 60.0
+    ):
+        self.output_path = output_path
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="yt-dlp")
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def run_job(self, name: str, func, *args) -> dict:
+        """
+        Run a blocking callable in the thread pool with timeout and retries.
+
+        func is called as func(*args, cancel_event) and should stop soon after
+        cancel_event is set. Cancelling the calling task sets the event and
+        waits for the thread before re-raising.
+
+        Returns:
+            Dict with name, status ("done" or "failed"), attempts, seconds and
+            result or error.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            cancel_event = threading.Event()
+            async with self._semaphore:
+                future = loop.run_in_executor(self._executor, func, *args, cancel_event)
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+                    return {'name': name, 'status': 'done', 'attempts': attempt,
+                            'seconds': time.perf_counter() - start, 'result': result}
+                except asyncio.CancelledError:
+                    await _stop(future, cancel_event)
+                    raise
+                except asyncio.TimeoutError:
+                    await _stop(future, cancel_event)
+                    error = TimeoutError(f"attempt timed out after {self.timeout}s")
+                except Exception as e:
+                    error = e
+
+            if attempt > self.retries or not _is_retryable(error):
+                return {'name': name, 'status': 'failed', 'attempts': attempt,
+                        'seconds': time.perf_counter() - start, 'error': str(error)}
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    async def run_all(self, jobs: list) -> list:
+        """
+        Run (name, func, *args) jobs in one task group.
+
+        Failed jobs are reported in their result; only cancellation stops the
+        group.
+        """
+        async with TaskGroup() as group:
+            tasks = [group.create_task(self.run_job(*job)) for job in jobs]
+        return [task.result() for task in tasks]
+
+    async def postprocess(self, name: str, func, *args) -> dict:
+        """Run a blocking postprocessing step (e.g. transcoding) as a job."""
+        def call(*call_args):
+            # Postprocessing steps cannot be interrupted; drop the cancel event
+            return func(*call_args[:-1])
+
+        return await self.run_job(name, call, *args)
+
+    async def list_playlist(self, playlist_url: str) -> list:
+        """Playlist entries (id, title, url, index) from a flat extraction."""
+        job = await self.run_job(playlist_url, _list_flat, playlist_url)
+        if job['status'] != 'done':
+            raise yt_dlp.utils.DownloadError(f"Could not list {playlist_url}: {job['error']}")
+        return job['result']['entries']
+
+    def _entry_jobs(self, entries: list, ydl_opts: dict, kind: str) -> list:
+        jobs = []
+        for entry in entries:
+            opts = dict(ydl_opts)
+            # Entries are downloaded one by one, so the playlist index is filled in here
+            opts['outtmpl'] = os.path.join(self.output_path, f"{entry['index']} - %(title)s.%(ext)s")
+            jobs.append((f"{kind} #{entry['index']} {entry['title']}", _extract, entry['url'], opts, True))
+        return jobs
+
+    async def download_entries(self, entries: list, **options) -> list:
+        """
+        Download entries from list_playlist() concurrently.
+
+        Args:
+            entries: Entries with id, title, url and index
+            **options: Options of download_playlist.build_download_options()
+        """
+        ydl_opts = build_download_options(self.output_path, **options)
+        ydl_opts['progress_hooks'] = []
+        return await self.run_all(self._entry_jobs(entries, ydl_opts, "download"))
+
+    async def fetch_captions(self, entries: list, subtitle_lang: str = "en") -> list:
+        """
+        Fetch captions (manual, else automatic) without downloading media.
+
+        Each done result holds the parsed segments and the caption kind.
+        """
+        results = await self.run_all(self._entry_jobs(entries, caption_options(subtitle_lang), "captions"))
+        for result in results:
+            if result['status'] == 'done':
+                segments, kind = entry_captions(result['result'], subtitle_lang)
+                result['result'] = {'segments': segments, 'kind': kind}
+        return results
+
+    async def download_playlist(self, playlist_url: str, **options) -> list:
+        """List a playlist with flat extraction, then download its entries concurrently."""
+        Path(self.output_path).mkdir(parents=True, exist_ok=True)
+        entries = await self.list_playlist(playlist_url)
+        return await self.download_entries(entries, **options)
+
+
+def _list_flat(playlist_url: str, cancel_event: threading.Event) -> dict:
+    """Flat listing has no progress callbacks to stop at, so cancel_event is not checked."""
+    return list_playlist_flat(playlist_url)
+
+
+def _extract(url: str, ydl_opts: dict, download: bool, cancel_event: threading.Event) -> dict:
+    """Blocking yt-dlp call that aborts at the next progress callback once cancel_event is set."""
+    def check_cancel(d):
+        if cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Cancelled by the orchestrator")
+
+    opts = dict(ydl_opts)
+    opts.update({
+        'quiet': True,
+        'continuedl': True,
+        'progress_hooks': list(opts.get('progress_hooks') or []) + [check_cancel],
+        'postprocessor_hooks': list(opts.get('postprocessor_hooks') or []) + [check_cancel],
+    })
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=download)
+        return ydl.sanitize_info(info)
+
+
+def print_summary(results: list, wall_seconds: float):
+    table = Table(title="[bold]Download Summary[/bold]", box=box.ROUNDED)
+    table.add_column("Job", style="cyan")
+    table.add_column("Status")
+    table.add_column("Attempts", justify="right")
+    table.add_column("Time", justify="right")
+    for result in results:
+        status = "[green]done[/green]" if result['status'] == 'done' else f"[red]failed[/red] [dim]{result['error']}[/dim]"
+        table.add_row(result['name'], status, str(result['attempts']), f"{result['seconds']:.1f}s")
+    console.print()
+    console.print(table)
+    failed = sum(1 for result in results if result['status'] != 'done')
+    console.print(f"[bold]{len(results) - failed}[/bold] done, [bold red]{failed}[/bold red] failed in {wall_seconds:.1f}s")
+
+
+async def _main(args) -> list:
+    options = {
+        'audio_only': args.audio_only,
+        'audio_format': args.audio_format,
+        'audio_quality': args.audio_quality,
+        'video_quality': args.video_quality,
+        'subtitles': args.subtitles,
+        'subtitle_lang': args.subtitle_lang,
+    }
+    async with AsyncDownloader(
+        output_path=args.output,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retries=args.retries,
+        backoff=args.backoff
+    ) as downloader:
+        results = []
+        for playlist_url in args.playlist_urls:
+            console.print(f"[dim]🔍 Listing playlist:[/dim] {playlist_url}")
+            results.extend(await downloader.download_playlist(playlist_url, **options))
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Download YouTube playlists concurrently with retries and resumable cancellation",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python async_downloader.py "PLAYLIST_URL" --audio-only --concurrency 8
+  python async_downloader.py "URL_1" "URL_2" --timeout 600 --retries 5
+        """
+    )
+    parser.add_argument('playlist_urls', nargs='+', help='URLs of the YouTube playlists')
+    parser.add_argument('--output', '-o', default='./downloads', help='Output directory (default: ./downloads)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Downloads running at the same time (default: 4)')
+    parser.add_argument('--timeout', type=float, default=None, help='Seconds allowed per attempt (default: no limit)')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per entry after the first attempt (default: 3)')
+    parser.add_argument('--backoff', type=float, default=2.0,
+                        help='Seconds before the first retry, doubled on each retry (default: 2)')
+    parser.add_argument('--audio-only', action='store_true', help='Download only audio (requires ffmpeg)')
+    parser.add_argument('--audio-format', default='mp3', choices=['mp3', 'm4a', 'opus', 'wav', 'flac'],
+                        help='Audio format when using --audio-only (default: mp3)')
+    parser.add_argument('--audio-quality', default='192', help='Audio quality/bitrate (default: 192)')
+    parser.add_argument('--video-quality', default='best', help='Video quality (default: best)')
+    parser.add_argument('--subtitles', action='store_true', help='Download subtitles along with videos')
+    parser.add_argument('--subtitle-lang', default='en', help='Subtitle language code (default: en)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        console.print("\n[bold yellow]Interrupted.[/bold yellow] Partial downloads were kept and resume on the next run.")
+        sys.exit(1)
+    except yt_dlp.utils.DownloadError as e:
+        console.print(f"[bold red]Download Error:[/bold red] {e}")
+        sys.exit(1)
+    print_summary(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Caption parsing for the transcript mode.
+
+Converts WebVTT and SRT subtitles into transcript segments and writes them in
+the same block format as speech_to_text/transcribe_audi_tg.py:
+
+    ================================================================================
+    File: <name>
+    ================================================================================
+
+    [HH:MM:SS.mmm --> HH:MM:SS.mmm] text
+"""
+
+import html
+import os
+import re
+from pathlib import Path
+
+_TIMING = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})"
+)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _seconds(hours, minutes, seconds, millis):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_captions(text, rolling=False):
+    """
+    Parse WebVTT or SRT text into segments.
+
+    YouTube's automatic captions repeat the previous line in every cue as
+    the text scrolls; with rolling set, repeated lines are dropped so each
+    spoken line appears once, at the cue where it first shows up. Manual
+    captions are kept cue for cue, since a line there may really be said
+    again.
+
+    Args:
+        text: Contents of a .vtt or .srt file
+        rolling: Drop lines repeated from the last three cue lines
+
+    Returns:
+        List of dicts with start, end and text.
+    """
+    segments = []
+    recent_lines = []
+
+    # Only empty lines separate cues; auto captions put space-only lines inside cues
+    for block in re.split(r"\n\n+", text.replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        timing_index = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing_index is None:
+            # WEBVTT header, NOTE and STYLE blocks
+            continue
+        match = _TIMING.search(lines[timing_index])
+        if not match:
+            continue
+
+        new_lines = []
+        for line in lines[timing_index + 1:]:
+            line = html.unescape(_TAG.sub("", line)).strip()
+            if line and not (rolling and line in recent_lines):
+                new_lines.append(line)
+                recent_lines = (recent_lines + [line])[-3:]
+        if new_lines:
+            segments.append({
+                "start": _seconds(*match.group(1, 2, 3, 4)),
+                "end": _seconds(*match.group(5, 6, 7, 8)),
+                "text": " ".join(new_lines),
+            })
+    return segments
+
+
+def load_captions(path, rolling=False):
+    return parse_captions(Path(path).read_text(encoding="utf-8", errors="replace"), rolling=rolling)
+
+
+def entry_captions(entry, subtitle_lang):
+    """
+    Captions yt-dlp wrote for a processed entry.
+
+    Returns:
+        Tuple of (segments, kind) where kind is "manual", "automatic" or
+        None when no caption file was written.
+    """
+    requested = entry.get('requested_subtitles') or {}
+    lang = subtitle_lang if subtitle_lang in requested else next(iter(requested), None)
+    subtitle = requested.get(lang)
+    if not subtitle or not subtitle.get('filepath') or not os.path.exists(subtitle['filepath']):
+        return [], None
+    kind = "manual" if lang in (entry.get('subtitles') or {}) else "automatic"
+    return load_captions(subtitle['filepath'], rolling=kind == "automatic"), kind
+
+
+def caption_coverage(segments, duration):
+    """Fraction of the media duration covered by caption segments"""
+    if not segments:
+        return 0.0
+    if not duration:
+        return 1.0
+    covered = sum(max(0.0, seg["end"] - seg["start"]) for seg in segments)
+    return min(1.0, covered / duration)
+
+
+def format_timestamp(seconds):
+    """Format seconds to [HH:MM:SS.mmm] format"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def format_file_block(filename, segments):
+    """Format one entry's section of the combined transcript"""
+    lines = [f"\n{'='*80}\n", f"File: {filename}\n", f"{'='*80}\n\n"]
+    for segment in segments:
+        lines.append(
+            f"[{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}] "
+            f"{segment['text'].strip()}\n"
+        )
+    return "".join(lines)
@@ -8,6 +8,7 @@ Download all videos or audio from a YouTube playlist using yt-dlp.
 import yt_dlp
 import sys
 import os
+import re
 import argparse
 from pathlib import Path
 from rich.console import Console
@@ -16,6 +17,9 @@ from rich.panel import Panel
 from rich.table import Table
 from rich import box
 
+from captions import entry_captions, caption_coverage, format_file_block
+from playlist_catalog import PlaylistCatalog
+
 
 # Initialize Rich console
 console = Console()
@@ -67,6 +71,70 @@ def progress_hook(d):
         console.print(f"[red]✗[/red] [bold red]Error downloading:[/bold red] {d.get('filename', 'Unknown file')}")
 
 
+def build_audio_options(audio_format: str = "mp3", audio_quality: str = "192") -> dict:
+    """yt-dlp options for best available audio converted to audio_format."""
+    return {
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': audio_format,
+            'preferredquality': audio_quality,
+        }],
+    }
+
+
+def build_download_options(
+    output_path: str,
+    audio_only: bool = False,
+    audio_format: str = "mp3",
+    audio_quality: str = "192",
+    video_quality: str = "best",
+    subtitles: bool = False,
+    subtitle_lang: str = "en"
+) -> dict:
+    """yt-dlp options shared by the full download and the sync mode."""
+    ydl_opts = {
+        'outtmpl': os.path.join(output_path, '%(playlist_index)s - %(title)s.%(ext)s'),
+        'quiet': True,  # We'll use our own progress display
+        'no_warnings': False,
+        'progress_hooks': [progress_hook],
+    }
+    
+    if audio_only:
+        # Audio-only download configuration
+        ydl_opts.update(build_audio_options(audio_format, audio_quality))
+    else:
+        # Video download configuration
+        if video_quality != "best":
+            ydl_opts['format'] = f'best[height<={video_quality}]'
+        else:
+            ydl_opts['format'] = 'best'
+    
+    # Subtitle configuration
+    if subtitles:
+        ydl_opts.update({
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': [subtitle_lang],
+        })
+    return ydl_opts
+
+
+def caption_options(subtitle_lang: str = "en", outtmpl: str = None) -> dict:
+    """yt-dlp options fetching captions (manual, else automatic) without the media."""
+    ydl_opts = {
+        'quiet': True,
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': [subtitle_lang],
+        'subtitlesformat': 'vtt/srt/best',
+    }
+    if outtmpl:
+        ydl_opts['outtmpl'] = outtmpl
+    return ydl_opts
+
+
 def download_playlist(
     playlist_url: str,
     audio_only: bool = False,
@@ -122,39 +190,16 @@ def download_playlist(
     console.print()
     
     # Configure yt-dlp options
-    ydl_opts = {
-        'outtmpl': os.path.join(output_path, '%(playlist_index)s - %(title)s.%(ext)s'),
-        'quiet': True,  # We'll use our own progress display
-        'no_warnings': False,
-        'progress_hooks': [progress_hook],
-    }
+    ydl_opts = build_download_options(
+        output_path, audio_only, audio_format, audio_quality, video_quality, subtitles, subtitle_lang
+    )
     
     if audio_only:
-        # Audio-only download configuration
-        ydl_opts.update({
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': audio_format,
-                'preferredquality': audio_quality,
-            }],
-        })
         console.print(f"[yellow]📻[/yellow] [bold]Mode:[/bold] Downloading audio only as [cyan]{audio_format.upper()}[/cyan] format")
     else:
-        # Video download configuration
-        if video_quality != "best":
-            ydl_opts['format'] = f'best[height<={video_quality}]'
-        else:
-            ydl_opts['format'] = 'best'
         console.print(f"[blue]🎥[/blue] [bold]Mode:[/bold] Downloading videos (quality: [cyan]{video_quality}[/cyan])")
     
-    # Subtitle configuration
     if subtitles:
-        ydl_opts.update({
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': [subtitle_lang],
-        })
         console.print(f"[magenta]📝[/magenta] [bold]Subtitles:[/bold] Will be downloaded in [cyan]{subtitle_lang}[/cyan]")
     
     console.print()
@@ -253,6 +298,341 @@ def download_playlist(
         sys.exit(1)
 
 
+def download_transcripts(
+    playlist_url: str,
+    output_path: str = "./downloads",
+    subtitle_lang: str = "en",
+    min_coverage: float = 0.5,
+    audio_format: str = "mp3",
+    audio_quality: str = "192",
+    fetch_audio: bool = True
+) -> dict:
+    """
+    Build a transcript of a playlist from its captions.
+    
+    Captions (manual, else automatic) are fetched for every entry without
+    downloading any media, converted to the segment format used by
+    speech_to_text/transcribe_audi_tg.py and written to transcript.txt in
+    playlist order. Only entries without usable captions have their audio
+    downloaded; they are listed in whisper_queue.txt for transcription.
+    
+    Args:
+        playlist_url: URL of the YouTube playlist
+        output_path: Directory for the transcript, captions and queued audio
+        subtitle_lang: Caption language code (e.g., "en", "pt")
+        min_coverage: Minimum fraction of an entry's duration the captions
+            must cover to be used instead of Whisper
+        audio_format: Audio format for entries queued for Whisper
+        audio_quality: Audio quality for entries queued for Whisper
+        fetch_audio: Download audio for queued entries (otherwise only list them)
+    
+    Returns:
+        Dict with captioned and queued entry lists and their durations.
+    """
+    output_dir = Path(output_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outtmpl = os.path.join(output_path, '%(playlist_index)s - %(title)s.%(ext)s')
+    
+    console.print(f"[magenta]📝[/magenta] [bold]Transcript mode:[/bold] fetching [cyan]{subtitle_lang}[/cyan] captions")
+    caption_opts = caption_options(subtitle_lang, outtmpl)
+    caption_opts['ignoreerrors'] = True
+    with yt_dlp.YoutubeDL(caption_opts) as ydl:
+        info = ydl.extract_info(playlist_url, download=True)
+        entries = [e for e in (info.get('entries') or [info]) if e]
+        names = {id(entry): Path(ydl.prepare_filename(entry)).stem for entry in entries}
+    
+    blocks = []
+    captioned = []
+    queued = []
+    for entry in entries:
+        segments, kind = entry_captions(entry, subtitle_lang)
+        duration = entry.get('duration') or 0
+        coverage = caption_coverage(segments, duration)
+        if segments and coverage >= min_coverage:
+            blocks.append(format_file_block(names[id(entry)], segments))
+            captioned.append({'entry': entry, 'kind': kind, 'coverage': coverage})
+            console.print(f"[green]✓[/green] [bold]#{entry.get('playlist_index', '?')}[/bold] "
+                          f"{kind} captions ({coverage:.0%} coverage): [cyan]{entry.get('title', 'Unknown')}[/cyan]")
+        else:
+            queued.append(entry)
+            reason = f"captions cover only {coverage:.0%}" if segments else "no captions"
+            console.print(f"[yellow]→[/yellow] [bold]#{entry.get('playlist_index', '?')}[/bold] "
+                          f"{reason}, queued for Whisper: [cyan]{entry.get('title', 'Unknown')}[/cyan]")
+    
+    transcript_file = output_dir / "transcript.txt"
+    transcript_file.write_text("".join(blocks), encoding="utf-8")
+    
+    queue_file = output_dir / "whisper_queue.txt"
+    queue_lines = []
+    if queued and fetch_audio:
+        console.print(f"\n[bold green]⬇️ Downloading audio for {len(queued)} entries without captions...[/bold green]\n")
+        audio_opts = {'quiet': True, 'progress_hooks': [progress_hook], 'ignoreerrors': True}
+        audio_opts.update(build_audio_options(audio_format, audio_quality))
+        for entry in queued:
+            # Downloaded by its own URL there is no playlist_index, so the caption file's name is reused
+            entry_opts = dict(audio_opts)
+            entry_opts['outtmpl'] = os.path.join(output_path, names[id(entry)].replace('%', '%%') + '.%(ext)s')
+            with yt_dlp.YoutubeDL(entry_opts) as ydl:
+                ydl.download([entry.get('webpage_url') or entry.get('url') or entry['id']])
+                audio_file = os.path.join(output_path, f"{names[id(entry)]}.{audio_format}")
+                if os.path.exists(audio_file):
+                    queue_lines.append(audio_file)
+                else:
+                    console.print(f"[red]✗[/red] [bold red]No audio downloaded for:[/bold red] {entry.get('title', 'Unknown')}")
+    else:
+        queue_lines = [entry.get('webpage_url') or entry.get('id', '') for entry in queued]
+    queue_file.write_text("".join(line + "\n" for line in queue_lines), encoding="utf-8")
+    
+    captioned_seconds = sum(item['entry'].get('duration') or 0 for item in captioned)
+    queued_seconds = sum(entry.get('duration') or 0 for entry in queued)
+    
+    summary_table = Table(title="[bold]Transcript Summary[/bold]", box=box.ROUNDED, show_header=False)
+    summary_table.add_row("[bold cyan]From captions:[/bold cyan]",
+                          f"[green]{len(captioned)}[/green] entries ({captioned_seconds / 3600:.1f} h of audio not sent to Whisper)")
+    summary_table.add_row("[bold cyan]Queued for Whisper:[/bold cyan]",
+                          f"[yellow]{len(queued)}[/yellow] entries ({queued_seconds / 3600:.1f} h)")
+    summary_table.add_row("[bold cyan]Transcript:[/bold cyan]", f"[green]{transcript_file}[/green]")
+    summary_table.add_row("[bold cyan]Whisper queue:[/bold cyan]", f"[green]{queue_file}[/green]")
+    console.print()
+    console.print(summary_table)
+    
+    return {
+        'captioned': captioned,
+        'queued': queued,
+        'captioned_seconds': captioned_seconds,
+        'queued_seconds': queued_seconds,
+        'transcript_file': str(transcript_file),
+        'queue_file': str(queue_file),
+    }
+
+
+def read_playlist_file(path: str) -> list:
+    """Playlist URLs from a text file, one per line; blank lines and # comments are skipped."""
+    urls = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            urls.append(line)
+    return urls
+
+
+def list_playlist_flat(playlist_url: str) -> dict:
+    """
+    List a playlist without resolving its videos.
+    
+    Flat extraction only reads the playlist pages, so the cost is one request
+    per page of entries instead of one per video.
+    
+    Returns:
+        Dict with the playlist id, title and entries (id, title, url, index).
+        A single video URL is listed as a playlist of one.
+    """
+    with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist', 'quiet': True}) as ydl:
+        info = ydl.extract_info(playlist_url, download=False)
+    entries = []
+    for position, entry in enumerate(info.get('entries') or [info], start=1):
+        if entry and entry.get('id'):
+            entries.append({
+                'id': entry['id'],
+                'title': entry.get('title') or entry['id'],
+                'url': entry.get('url') or entry.get('webpage_url') or entry['id'],
+                'index': entry.get('playlist_index') or position,
+            })
+    return {
+        'id': info.get('id') or playlist_url,
+        'title': info.get('title', 'Unknown Playlist'),
+        'entries': entries,
+    }
+
+
+def entry_files(entry: dict) -> list:
+    """Names of the media and subtitle files yt-dlp wrote for a processed entry."""
+    paths = [download.get('filepath') for download in entry.get('requested_downloads') or []]
+    paths.extend(subtitle.get('filepath') for subtitle in (entry.get('requested_subtitles') or {}).values())
+    return [os.path.basename(path) for path in paths if path]
+
+
+def rename_moved_entry(output_path: str, entry: dict) -> list:
+    """
+    Rename a moved entry's files from its previous playlist index to the new one.
+    
+    yt-dlp zero-pads %(playlist_index)s to the width of the largest index
+    (05 in a 12-entry playlist), so the old index is matched with any
+    leading zeros and the new one is written at the width the file uses.
+    
+    Returns:
+        The entry's file names after renaming. A file that is missing, or
+        whose new name is taken, keeps its current name.
+    """
+    old_prefix = re.compile(rf"^(0*{entry['previous_index']}) - ")
+    names = []
+    renamed = False
+    for name in entry['files']:
+        new_name = name
+        match = old_prefix.match(name)
+        if match:
+            new_index = str(entry['index']).zfill(len(match.group(1)))
+            new_name = f"{new_index} - {name[match.end():]}"
+        old_path = os.path.join(output_path, name)
+        new_path = os.path.join(output_path, new_name)
+        if new_name != name and os.path.exists(old_path) and not os.path.exists(new_path):
+            os.replace(old_path, new_path)
+            names.append(new_name)
+            renamed = True
+        else:
+            names.append(name)
+    if renamed:
+        console.print(f"[yellow]↕[/yellow] [bold]#{entry['previous_index']} → #{entry['index']}[/bold] "
+                      f"Renamed: [cyan]{entry['title']}[/cyan]")
+    return names
+
+
+def sync_playlist(
+    playlist_url: str,
+    catalog: PlaylistCatalog,
+    audio_only: bool = False,
+    output_path: str = "./downloads",
+    audio_format: str = "mp3",
+    audio_quality: str = "192",
+    video_quality: str = "best",
+    subtitles: bool = False,
+    subtitle_lang: str = "en"
+) -> dict:
+    """
+    Download only what changed in a playlist since the last sync.
+    
+    The playlist is listed with flat extraction and compared with the
+    catalog. Only new entries are resolved and downloaded, through yt-dlp's
+    playlist_items selection. Entries that moved to another position are
+    not fetched again; their files are renamed to the new index (see
+    rename_moved_entry). The rest are not touched.
+    
+    Args:
+        playlist_url: URL of the YouTube playlist
+        catalog: Catalog of previously seen entries, updated in place
+        Other arguments are the same as download_playlist().
+    
+    Returns:
+        Dict with the playlist title, entry counts and the ids downloaded.
+    """
+    global progress, task_id
+    
+    console.print(f"[dim]🔍 Listing playlist (flat):[/dim] {playlist_url}")
+    playlist = list_playlist_flat(playlist_url)
+    changes = catalog.diff(playlist['id'], playlist['entries'])
+    targets = sorted(changes['new'], key=lambda entry: entry['index'])
+    
+    console.print(
+        f"[bold cyan]{playlist['title']}[/bold cyan]: {len(playlist['entries'])} entries, "
+        f"[green]{len(changes['new'])} new[/green], [yellow]{len(changes['moved'])} moved[/yellow], "
+        f"[dim]{len(changes['removed'])} removed[/dim]"
+    )
+    
+    files = {}
+    for entry in changes['moved']:
+        files[entry['id']] = rename_moved_entry(output_path, entry)
+    
+    downloaded_ids = set()
+    if targets:
+        ydl_opts = build_download_options(
+            output_path, audio_only, audio_format, audio_quality, video_quality, subtitles, subtitle_lang
+        )
+        ydl_opts['playlist_items'] = ",".join(str(entry['index']) for entry in targets)
+        ydl_opts['ignoreerrors'] = True
+        
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress_bar:
+            progress = progress_bar
+            task_id = progress_bar.add_task(f"[green]⬇️ Downloading {len(targets)} changed entries...", total=100)
+            try:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(playlist_url, download=True)
+            finally:
+                progress = None
+                task_id = None
+        
+        wanted = {entry['id'] for entry in targets}
+        for entry in (info or {}).get('entries') or []:
+            if entry and entry.get('id') in wanted:
+                downloaded_ids.add(entry['id'])
+                files[entry['id']] = entry_files(entry)
+        for entry in targets:
+            if entry['id'] not in downloaded_ids:
+                console.print(f"[red]✗[/red] [bold]#{entry['index']}[/bold] Not downloaded: [cyan]{entry['title']}[/cyan]")
+    else:
+        console.print("[green]✓[/green] Nothing new to download")
+    
+    catalog.record(
+        playlist['id'], playlist['title'], playlist['entries'], files,
+        removed_ids=[entry['id'] for entry in changes['removed']]
+    )
+    return {
+        'title': playlist['title'],
+        'listed': len(playlist['entries']),
+        'new': len(changes['new']),
+        'moved': len(changes['moved']),
+        'removed': len(changes['removed']),
+        'resolved': len(targets),
+        'downloaded_ids': downloaded_ids,
+    }
+
+
+def sync_playlists(playlist_urls: list, output_path: str = "./downloads", catalog_path: str = None, **options) -> list:
+    """
+    Sync several playlists into one output directory.
+    
+    Args:
+        playlist_urls: Playlist URLs to sync
+        output_path: Directory to save downloads
+        catalog_path: Catalog file (default: playlist_catalog.json in output_path)
+        **options: Download options passed to sync_playlist()
+    
+    Returns:
+        List of per-playlist results from sync_playlist().
+    """
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    catalog = PlaylistCatalog(catalog_path or os.path.join(output_path, "playlist_catalog.json"))
+    
+    console.print("\n")
+    console.print(Panel.fit("[bold cyan]YouTube Playlist Sync[/bold cyan]", border_style="cyan"))
+    console.print()
+    
+    results = []
+    for playlist_url in playlist_urls:
+        try:
+            results.append(sync_playlist(playlist_url, catalog, output_path=output_path, **options))
+        except yt_dlp.utils.DownloadError as e:
+            console.print(f"[red]✗[/red] [bold red]Could not sync[/bold red] {playlist_url}: [dim]{e}[/dim]")
+        console.print()
+    
+    summary_table = Table(title="[bold]Sync Summary[/bold]", box=box.ROUNDED)
+    summary_table.add_column("Playlist", style="cyan")
+    summary_table.add_column("Entries", justify="right")
+    summary_table.add_column("New", justify="right", style="green")
+    summary_table.add_column("Moved", justify="right", style="yellow")
+    summary_table.add_column("Removed", justify="right", style="dim")
+    summary_table.add_column("Resolved", justify="right")
+    summary_table.add_column("Downloaded", justify="right", style="green")
+    for result in results:
+        summary_table.add_row(
+            result['title'], str(result['listed']), str(result['new']), str(result['moved']),
+            str(result['removed']), str(result['resolved']), str(len(result['downloaded_ids']))
+        )
+    console.print(summary_table)
+    
+    listed = sum(result['listed'] for result in results)
+    resolved = sum(result['resolved'] for result in results)
+    console.print(f"[dim]Resolved {resolved} of {listed} entries; catalog:[/dim] [green]{catalog.path}[/green]")
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Download all videos or audio from a YouTube playlist",
@@ -273,12 +653,18 @@ Examples:
   
   # Download to custom directory
   python download_playlist.py "PLAYLIST_URL" --output ./my_downloads
+  
+  # Transcript from captions; audio only for entries without captions
+  python download_playlist.py "PLAYLIST_URL" --transcript --subtitle-lang pt
+  
+  # Download only what was added since the last sync, for every playlist in a file
+  python download_playlist.py playlists_to_download.txt --sync --audio-only
         """
     )
     
     parser.add_argument(
         'playlist_url',
-        help='URL of the YouTube playlist to download'
+        help='URL of the YouTube playlist to download (with --sync, also a file of playlist URLs)'
     )
     
     parser.add_argument(
@@ -324,8 +710,51 @@ Examples:
         help='Subtitle language code (default: en)'
     )
     
+    parser.add_argument(
+        '--transcript',
+        action='store_true',
+        help='Build a transcript from captions; download audio only for entries without usable captions'
+    )
+    
+    parser.add_argument(
+        '--min-caption-coverage',
+        type=float,
+        default=0.5,
+        help='Fraction of an entry the captions must cover to skip Whisper (default: 0.5)'
+    )
+    
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='Download only entries added or moved since the last sync (tracked in a catalog)'
+    )
+    
+    parser.add_argument(
+        '--catalog',
+        default=None,
+        help='Catalog file for --sync (default: playlist_catalog.json in the output directory)'
+    )
+    
     args = parser.parse_args()
     
+    if args.sync:
+        if os.path.isfile(args.playlist_url):
+            playlist_urls = read_playlist_file(args.playlist_url)
+        else:
+            playlist_urls = [args.playlist_url]
+        sync_playlists(
+            playlist_urls,
+            output_path=args.output,
+            catalog_path=args.catalog,
+            audio_only=args.audio_only,
+            audio_format=args.audio_format,
+            audio_quality=args.audio_quality,
+            video_quality=args.video_quality,
+            subtitles=args.subtitles,
+            subtitle_lang=args.subtitle_lang
+        )
+        return
+    
     # Validate playlist URL
     if 'youtube.com' not in args.playlist_url and 'youtu.be' not in args.playlist_url:
         console.print("[yellow]⚠[/yellow] [bold yellow]Warning:[/bold yellow] The URL doesn't appear to be a YouTube URL.")
@@ -334,6 +763,17 @@ Examples:
             console.print("[red]Aborted.[/red]")
             sys.exit(0)
     
+    if args.transcript:
+        download_transcripts(
+            playlist_url=args.playlist_url,
+            output_path=args.output,
+            subtitle_lang=args.subtitle_lang,
+            min_coverage=args.min_caption_coverage,
+            audio_format=args.audio_format,
+            audio_quality=args.audio_quality
+        )
+        return
+    
     download_playlist(
         playlist_url=args.playlist_url,
         audio_only=args.audio_only,
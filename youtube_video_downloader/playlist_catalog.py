@@ -0,0 +1,90 @@
+"""
+Local catalog of playlist entries for incremental sync.
+
+Stores, per playlist, every entry seen so far keyed by video id, with its
+position, whether it was downloaded and the files it was saved as. A sync
+compares a flat listing of the playlist (IDs, titles and positions only)
+with the catalog, so only new entries need full metadata resolution and a
+download; a moved entry only has its files renamed to the new position.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+
+class PlaylistCatalog:
+    """Previously seen playlist entries, persisted as JSON."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self.playlists = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.playlists = {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.playlists, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def diff(self, playlist_id: str, flat_entries: list) -> dict:
+        """
+        Compare a flat playlist listing with the catalog.
+
+        Args:
+            playlist_id: ID of the playlist
+            flat_entries: Dicts with id, title and index, in playlist order
+
+        Returns:
+            Dict with lists "new" (never downloaded), "moved" (downloaded,
+            but at a different position now; these carry previous_index and
+            the saved files), "unchanged" and "removed" (catalog entries no
+            longer in the playlist).
+        """
+        known = self.playlists.get(playlist_id, {}).get("entries", {})
+        result = {"new": [], "moved": [], "unchanged": [], "removed": []}
+        listed = set()
+        for entry in flat_entries:
+            listed.add(entry["id"])
+            saved = known.get(entry["id"])
+            if not saved or not saved.get("downloaded"):
+                result["new"].append(entry)
+            elif saved.get("index") != entry["index"]:
+                result["moved"].append({**entry, "previous_index": saved.get("index"),
+                                        "files": saved.get("files", [])})
+            else:
+                result["unchanged"].append(entry)
+        result["removed"] = [
+            {"id": entry_id, **saved} for entry_id, saved in known.items()
+            if entry_id not in listed and not saved.get("removed")
+        ]
+        return result
+
+    def record(self, playlist_id: str, title: str, flat_entries: list, files: dict, removed_ids=()):
+        """
+        Update a playlist after a sync.
+
+        Every listed entry gets its current position. Entries in files
+        (video id to the file names saved or renamed this sync) are marked
+        downloaded. Entries that left the playlist are kept and flagged as
+        removed.
+        """
+        playlist = self.playlists.setdefault(playlist_id, {"entries": {}})
+        playlist["title"] = title
+        playlist["last_sync"] = time.time()
+        now = time.time()
+        for entry in flat_entries:
+            saved = playlist["entries"].setdefault(entry["id"], {"first_seen": now, "downloaded": False})
+            saved["title"] = entry["title"]
+            saved.pop("removed", None)
+            saved["index"] = entry["index"]
+            if entry["id"] in files:
+                saved["downloaded"] = True
+                saved["files"] = files[entry["id"]]
+        for entry_id in removed_ids:
+            if entry_id in playlist["entries"]:
+                playlist["entries"][entry_id]["removed"] = True
+        self.save()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Playlist-to-Transcript Pipeline
+
+Downloads and transcribes a YouTube playlist in one run, with the two stages
+overlapping: a downloader thread feeds a bounded queue that warm Whisper
+workers consume, so the network keeps working while the CPU/GPU transcribes.
+
+- Audio is downloaded as the best audio stream in its original container
+  (webm/m4a) and decoded by Whisper's FFmpeg loader directly; there is no MP3
+  transcode step.
+- Entries with usable captions are transcribed from them and skip Whisper.
+- Per-entry state is kept in pipeline_state.json, so an interrupted run picks
+  up where it stopped: finished entries are skipped and already downloaded
+  audio is not fetched again.
+
+Requires openai-whisper in addition to the downloader's dependencies.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import yt_dlp
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from captions import entry_captions, caption_coverage, format_file_block
+from download_playlist import caption_options, list_playlist_flat
+
+console = Console()
+
+# Sentinel telling a worker that no more entries will come
+_DONE = object()
+
+
+class PipelineState:
+    """Per-entry progress, persisted as JSON after every change."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, entry_id: str) -> dict:
+        with self._lock:
+            return dict(self.entries.get(entry_id, {}))
+
+    def update(self, entry_id: str, **fields):
+        with self._lock:
+            self.entries.setdefault(entry_id, {}).update(fields)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.entries, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+class TranscriptPipeline:
+    """Downloader thread -> bounded queue -> Whisper worker threads."""
+
+    def __init__(
+        self,
+        playlist_url: str,
+        output_path: str = "./transcripts",
+        model_name: str = "medium",
+        workers: int = 1,
+        queue_size: int = 4,
+        language: str = None,
+        use_captions: bool = True,
+        min_coverage: float = 0.5,
+        keep_audio: bool = False
+    ):
+        self.playlist_url = playlist_url
+        self.output_dir = Path(output_path)
+        self.audio_dir = self.output_dir / "audio"
+        self.segments_dir = self.output_dir / "segments"
+        for directory in (self.output_dir, self.audio_dir, self.segments_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.language = language
+        self.use_captions = use_captions
+        self.min_coverage = min_coverage
+        self.keep_audio = keep_audio
+
+        self.state = PipelineState(self.output_dir / "pipeline_state.json")
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.stats_lock = threading.Lock()
+        self.stats = {"download_seconds": 0.0, "transcribe_seconds": 0.0,
+                      "captioned": 0, "transcribed": 0, "skipped": 0, "failed": 0}
+
+    def _add_stat(self, name, value):
+        with self.stats_lock:
+            self.stats[name] += value
+
+    def list_entries(self) -> list:
+        """Playlist entries (id, title, url, index) from a flat extraction."""
+        return list_playlist_flat(self.playlist_url)['entries']
+
+    def _segment_file(self, entry: dict) -> Path:
+        return self.segments_dir / f"{entry['index']:05d}-{entry['id']}.txt"
+
+    def _entry_name(self, entry: dict) -> str:
+        return f"{entry['index']} - {entry['title']}"
+
+    def _try_captions(self, entry: dict) -> tuple:
+        """
+        Write the entry's transcript from captions if they are usable.
+
+        Returns:
+            Tuple of (used, info). info is the resolved entry, reused for the
+            audio download, or None when the lookup itself failed.
+        """
+        opts = caption_options(self.language or 'en', str(self.audio_dir / '%(id)s.%(ext)s'))
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(entry['url'], download=True)
+        except Exception as e:
+            # e.g. HTTP 429 on the subtitle file: fall back to Whisper
+            console.print(f"[yellow]⚠[/yellow] [bold]#{entry['index']}[/bold] caption lookup failed, using audio: [dim]{e}[/dim]")
+            return False, None
+        segments, kind = entry_captions(info, self.language or 'en')
+        if not segments or caption_coverage(segments, info.get('duration')) < self.min_coverage:
+            return False, info
+        self._segment_file(entry).write_text(format_file_block(self._entry_name(entry), segments), encoding="utf-8")
+        self.state.update(entry['id'], status="captioned", captions=kind)
+        self._add_stat("captioned", 1)
+        console.print(f"[green]✓[/green] [bold]#{entry['index']}[/bold] from {kind} captions: [cyan]{entry['title']}[/cyan]")
+        return True, info
+
+    def _download_audio(self, entry: dict, info: dict = None) -> str:
+        """
+        Download the best audio stream as-is and return its path.
+
+        info, when given, is the entry as already resolved by the caption
+        lookup; its formats are reused instead of extracting the page again.
+        """
+        opts = {
+            'quiet': True,
+            'format': 'bestaudio/best',
+            'outtmpl': str(self.audio_dir / '%(id)s.%(ext)s'),
+            'continuedl': True,
+        }
+        start = time.perf_counter()
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if info is not None:
+                info = ydl.process_ie_result(ydl.sanitize_info(info, True), download=True)
+            else:
+                info = ydl.extract_info(entry['url'], download=True)
+        self._add_stat("download_seconds", time.perf_counter() - start)
+        downloads = info.get('requested_downloads') or [{}]
+        return downloads[0].get('filepath') or ydl.prepare_filename(info)
+
+    def _put(self, item) -> bool:
+        """
+        Queue an item, waiting for room until the run is stopped.
+
+        Workers may never start when a run is stopped, so this never blocks
+        on a full queue for good. Returns False if the item was not queued.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce(self, entries: list):
+        """Download stage: feed audio paths to the workers, oldest entries first."""
+        try:
+            for entry in entries:
+                if self.stop_event.is_set():
+                    break
+                saved = self.state.get(entry['id'])
+                if saved.get('status') in ("transcribed", "captioned") and self._segment_file(entry).exists():
+                    self._add_stat("skipped", 1)
+                    continue
+
+                try:
+                    audio_path = saved.get('audio')
+                    if saved.get('status') == "downloaded" and audio_path and os.path.exists(audio_path):
+                        console.print(f"[dim]↺ #{entry['index']} audio already downloaded[/dim]")
+                    else:
+                        info = None
+                        if self.use_captions:
+                            captioned, info = self._try_captions(entry)
+                            if captioned:
+                                continue
+                        console.print(f"[blue]⬇️[/blue] [bold]#{entry['index']}[/bold] downloading audio: [cyan]{entry['title']}[/cyan]")
+                        audio_path = self._download_audio(entry, info)
+                        self.state.update(entry['id'], status="downloaded", audio=audio_path)
+                except Exception as e:
+                    self.state.update(entry['id'], status="failed", error=str(e))
+                    self._add_stat("failed", 1)
+                    console.print(f"[red]✗[/red] [bold red]#{entry['index']} download failed:[/bold red] {e}")
+                    continue
+
+                # Blocks while the workers are busy, bounding the audio waiting on disk
+                self._put((entry, audio_path))
+        finally:
+            for _ in range(self.workers):
+                if not self._put(_DONE):
+                    break
+
+    def consume(self, worker_index: int, model):
+        """Inference stage: transcribe queued audio with a warm model."""
+        while True:
+            item = self.queue.get()
+            if item is _DONE or self.stop_event.is_set():
+                return
+            entry, audio_path = item
+            try:
+                start = time.perf_counter()
+                result = model.transcribe(audio_path, language=self.language, verbose=None)
+                elapsed = time.perf_counter() - start
+                segments = result.get("segments", [])
+                self._segment_file(entry).write_text(
+                    format_file_block(self._entry_name(entry), segments), encoding="utf-8"
+                )
+                self.state.update(entry['id'], status="transcribed", language=result.get("language"))
+                self._add_stat("transcribe_seconds", elapsed)
+                self._add_stat("transcribed", 1)
+                if not self.keep_audio:
+                    os.unlink(audio_path)
+                console.print(f"[green]✓[/green] [bold]#{entry['index']}[/bold] transcribed by worker {worker_index} "
+                              f"in {elapsed:.1f}s: [cyan]{entry['title']}[/cyan]")
+            except Exception as e:
+                self.state.update(entry['id'], error=str(e))
+                self._add_stat("failed", 1)
+                console.print(f"[red]✗[/red] [bold red]#{entry['index']} transcription failed:[/bold red] {e}")
+
+    def run(self) -> dict:
+        """Run both stages to completion and write the combined transcript."""
+        import whisper
+
+        wall_start = time.perf_counter()
+
+        # Load models while the playlist is listed and the first download starts
+        models = [None] * self.workers
+        load_errors = [None] * self.workers
+        def load(i):
+            try:
+                models[i] = whisper.load_model(self.model_name)
+            except Exception as e:
+                load_errors[i] = e
+        loaders = [threading.Thread(target=load, args=(i,), daemon=True) for i in range(self.workers)]
+        for loader in loaders:
+            loader.start()
+
+        producer = None
+        consumers = []
+        try:
+            entries = self.list_entries()
+            console.print(f"[cyan]🔍[/cyan] {len(entries)} entries in playlist")
+            producer = threading.Thread(target=self.produce, args=(entries,), name="downloader")
+            producer.start()
+
+            for loader in loaders:
+                loader.join()
+            for error in load_errors:
+                if error is not None:
+                    raise RuntimeError(f"Could not load Whisper model '{self.model_name}': {error}") from error
+
+            consumers = [
+                threading.Thread(target=self.consume, args=(i + 1, models[i]), name=f"whisper-{i + 1}")
+                for i in range(self.workers)
+            ]
+            for consumer in consumers:
+                consumer.start()
+
+            producer.join()
+            for consumer in consumers:
+                consumer.join()
+        except BaseException as e:
+            # Stop the downloader (and the workers) whatever interrupted the run
+            self.stop_event.set()
+            if isinstance(e, KeyboardInterrupt):
+                console.print("\n[yellow]Stopping after the current transcriptions; progress is saved.[/yellow]")
+            if producer is not None:
+                producer.join()
+            for consumer in consumers:
+                consumer.join()
+            if not isinstance(e, KeyboardInterrupt):
+                raise
+
+        # Combined transcript in playlist order
+        transcript_file = self.output_dir / "transcript.txt"
+        blocks = [self._segment_file(e).read_text(encoding="utf-8") for e in entries if self._segment_file(e).exists()]
+        transcript_file.write_text("".join(blocks), encoding="utf-8")
+
+        self.stats["wall_seconds"] = time.perf_counter() - wall_start
+        self.stats["transcript_file"] = str(transcript_file)
+        return self.stats
+
+
+def print_summary(stats: dict):
+    table = Table(title="[bold]Pipeline Summary[/bold]", box=box.ROUNDED, show_header=False)
+    table.add_row("[bold cyan]Transcribed with Whisper:[/bold cyan]", f"[green]{stats['transcribed']}[/green]")
+    table.add_row("[bold cyan]From captions:[/bold cyan]", f"[green]{stats['captioned']}[/green]")
+    table.add_row("[bold cyan]Already done:[/bold cyan]", str(stats['skipped']))
+    table.add_row("[bold cyan]Failed:[/bold cyan]", f"[red]{stats['failed']}[/red]")
+    table.add_row("[bold cyan]Download time:[/bold cyan]", f"{stats['download_seconds']:.1f}s")
+    table.add_row("[bold cyan]Transcription time:[/bold cyan]", f"{stats['transcribe_seconds']:.1f}s")
+    table.add_row("[bold cyan]Wall time:[/bold cyan]", f"{stats['wall_seconds']:.1f}s")
+    overlapped = stats['download_seconds'] + stats['transcribe_seconds'] - stats['wall_seconds']
+    if overlapped > 0:
+        table.add_row("[bold cyan]Saved by overlapping:[/bold cyan]", f"[green]{overlapped:.1f}s[/green]")
+    table.add_row("[bold cyan]Transcript:[/bold cyan]", f"[green]{stats['transcript_file']}[/green]")
+    console.print()
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Download and transcribe a YouTube playlist with overlapping stages",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python transcript_pipeline.py "PLAYLIST_URL" --output ./talks --language pt
+  python transcript_pipeline.py "PLAYLIST_URL" --model small --workers 2 --no-captions
+        """
+    )
+    parser.add_argument('playlist_url', help='URL of the YouTube playlist')
+    parser.add_argument('--output', '-o', default='./transcripts', help='Output directory (default: ./transcripts)')
+    parser.add_argument('--model', default='medium', help='Whisper model size (default: medium)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Whisper workers, each with its own model in memory (default: 1)')
+    parser.add_argument('--queue-size', type=int, default=4,
+                        help='Downloaded entries allowed to wait for a worker (default: 4)')
+    parser.add_argument('--language', default=None, help='Spoken/caption language code (default: auto-detect)')
+    parser.add_argument('--no-captions', action='store_true', help='Always use Whisper, even when captions exist')
+    parser.add_argument('--min-caption-coverage', type=float, default=0.5,
+                        help='Fraction of an entry the captions must cover to skip Whisper (default: 0.5)')
+    parser.add_argument('--keep-audio', action='store_true', help='Keep downloaded audio after transcription')
+    args = parser.parse_args()
+
+    pipeline = TranscriptPipeline(
+        playlist_url=args.playlist_url,
+        output_path=args.output,
+        model_name=args.model,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        language=args.language,
+        use_captions=not args.no_captions,
+        min_coverage=args.min_caption_coverage,
+        keep_audio=args.keep_audio
+    )
+    try:
+        stats = pipeline.run()
+    except yt_dlp.utils.DownloadError as e:
+        console.print(f"[bold red]Download Error:[/bold red] {e}")
+        sys.exit(1)
+    except RuntimeError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    print_summary(stats)
+
+
+if __name__ == "__main__":
+    main()